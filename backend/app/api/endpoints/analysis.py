@@ -4,8 +4,8 @@ Analysis API endpoints for paper concept extraction and clarification
 
 import uuid
 from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import PlainTextResponse, JSONResponse
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import PlainTextResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
 from ...models.paper import ConceptResponse, Concept
@@ -88,26 +88,7 @@ async def analyze_paper(
             name = concept_data.get("name", "")
             description = concept_data.get("description", "")
 
-            # Only filter out obvious generic patterns
-            is_generic = (
-                not name
-                or not description
-                or len(name) <= 3
-                or len(description) <= 10
-                or
-                # Only catch the most obvious generic patterns
-                name.lower().startswith("key concept from")
-                or "temporarily unavailable" in description.lower()
-                or "clear, descriptive name" in description.lower()
-                or "Research Implementation Details" in name
-                or "Performance Optimization Strategy" in name
-                or "Experimental Design Framework" in name
-                or "Technical Analysis Method" in name
-                or "Data Processing Technique" in name
-                or "Statistical Evaluation Approach" in name
-            )
-
-            if not is_generic:
+            if not is_generic_concept(name, description):
                 valid_concepts_data.append(concept_data)
                 print(f"Valid analysis concept: '{name}'")
             else:
@@ -243,6 +224,35 @@ async def delete_concept(
     return {"message": "Concept deleted successfully"}
 
 
+def _build_clarify_context(paper, request: ClarifyRequest) -> tuple[str, str]:
+    """Return (query text, full context) for a clarify request"""
+    # Support both question format and text_snippet format
+    query_text = request.question if request.question else request.text_snippet
+    
+    if not query_text:
+        raise HTTPException(status_code=400, detail="Question or text_snippet is required")
+
+    # Build context with paper information
+    context_parts = [f"Paper title: {paper.title}"]
+    if paper.abstract:
+        context_parts.append(f"Summary: {paper.abstract[:500]}")
+    if paper.content:
+        context_parts.append(f"Paper content (first 2000 chars): {paper.content[:2000]}")
+    if request.context:
+        context_parts.append(request.context)
+    
+    base_context = ". ".join(context_parts)
+
+    # Build conversation history for context
+    conversation_context = ""
+    if request.conversation_history:
+        conversation_context = "\n\nPrevious conversation:\n"
+        for msg in request.conversation_history[-5:]:  # Last 5 messages for context
+            conversation_context += f"{msg.role}: {msg.content}\n"
+    
+    return query_text, base_context + conversation_context
+
+
 @router.post("/papers/{paper_id}/clarify")
 async def clarify_text(
     paper_id: str,
@@ -259,31 +269,7 @@ async def clarify_text(
         raise HTTPException(status_code=404, detail="Paper not found")
 
     try:
-        # Support both question format and text_snippet format
-        query_text = request.question if request.question else request.text_snippet
-        
-        if not query_text:
-            raise HTTPException(status_code=400, detail="Question or text_snippet is required")
-
-        # Build context with paper information
-        context_parts = [f"Paper title: {paper.title}"]
-        if paper.abstract:
-            context_parts.append(f"Summary: {paper.abstract[:500]}")
-        if paper.content:
-            context_parts.append(f"Paper content (first 2000 chars): {paper.content[:2000]}")
-        if request.context:
-            context_parts.append(request.context)
-        
-        base_context = ". ".join(context_parts)
-
-        # Build conversation history for context
-        conversation_context = ""
-        if request.conversation_history:
-            conversation_context = "\n\nPrevious conversation:\n"
-            for msg in request.conversation_history[-5:]:  # Last 5 messages for context
-                conversation_context += f"{msg.role}: {msg.content}\n"
-        
-        full_context = base_context + conversation_context
+        query_text, full_context = _build_clarify_context(paper, request)
 
         # Use Gemini to answer the question with conversation context
         explanation = await gemini_service.clarify_text_with_gemini(
@@ -302,6 +288,30 @@ async def clarify_text(
         raise HTTPException(status_code=500, detail=f"Clarification failed: {str(e)}")
 
 
+@router.post("/papers/{paper_id}/clarify/stream")
+async def clarify_text_stream(
+    paper_id: str,
+    request: ClarifyRequest,
+    api_key: str = Depends(verify_api_key),
+    user_id: Optional[str] = Depends(get_current_user_id)
+) -> StreamingResponse:
+    """
+    Same as /clarify, but streams the answer as plain text while Gemini
+    generates it
+    """
+    verify_paper_ownership(paper_id, user_id)
+    paper = PaperStorage.get_paper(paper_id, user_id)
+    if not paper:
+        raise HTTPException(status_code=404, detail="Paper not found")
+
+    query_text, full_context = _build_clarify_context(paper, request)
+
+    return StreamingResponse(
+        gemini_service.stream_clarify_text_with_gemini(text=query_text, context=full_context),
+        media_type="text/plain; charset=utf-8",
+    )
+
+
 @router.get("/papers/{paper_id}/insights")
 async def get_paper_insights(
     paper_id: str,
@@ -346,8 +356,9 @@ async def extract_concepts(
 
     try:
         # Extract concepts using Gemini
+        # A refresh must ask Gemini again rather than replay the cached reply
         concepts_data = await gemini_service.generate_concepts_with_gemini(
-            paper.content
+            paper.content, use_cache=False
         )
 
         print(f"Raw concepts from Gemini: {len(concepts_data)} concepts")
@@ -362,26 +373,7 @@ async def extract_concepts(
             name = concept_data.get("name", "")
             description = concept_data.get("description", "")
 
-            # Only filter out obvious generic patterns
-            is_generic = (
-                not name
-                or not description
-                or len(name) <= 3
-                or len(description) <= 10
-                or
-                # Only catch the most obvious generic patterns
-                name.lower().startswith("key concept from")
-                or "temporarily unavailable" in description.lower()
-                or "clear, descriptive name" in description.lower()
-                or "Research Implementation Details" in name
-                or "Performance Optimization Strategy" in name
-                or "Experimental Design Framework" in name
-                or "Technical Analysis Method" in name
-                or "Data Processing Technique" in name
-                or "Statistical Evaluation Approach" in name
-            )
-
-            if not is_generic:
+            if not is_generic_concept(name, description):
                 valid_concepts_data.append(concept_data)
                 print(f"Valid concept: '{name}'")
             else:
@@ -424,10 +416,13 @@ async def extract_concepts(
 @router.post("/papers/{paper_id}/generate-additional-concept")
 async def generate_additional_concept(
     paper_id: str,
+    count: int = Query(1, ge=1, le=5),
     user_id: Optional[str] = Depends(get_current_user_id)
 ) -> Dict[str, Any]:
     """
-    Generate ONE additional concept for a paper, considering existing concepts
+    Generate additional concepts for a paper, considering existing concepts.
+    All `count` concepts come from a single Gemini call; `new_concept` is the
+    first of them and `new_concepts` holds the whole batch.
     """
     verify_paper_ownership(paper_id, user_id)
     paper = PaperStorage.get_paper(paper_id, user_id)
@@ -442,82 +437,82 @@ async def generate_additional_concept(
         existing_concept_names = [c.name for c in paper.concepts]
 
         print(
-            f"Generating additional concept beyond existing: {existing_concept_names}"
-        )
-
-        # Generate ONE additional concept using Gemini
-        new_concept_data = await gemini_service.generate_additional_concept_with_gemini(
-            content=paper.content, existing_concepts=existing_concept_names
+            f"Generating {count} additional concept(s) beyond existing: {existing_concept_names}"
         )
 
-        if new_concept_data:
-            name = new_concept_data.get("name", "")
-            description = new_concept_data.get("description", "")
-
-            # Filter out generic/fallback concepts
-            is_generic = (
-                not name
-                or not description
-                or len(name) <= 3
-                or len(description) <= 10
-                or name.lower().startswith("key concept from")
-                or "temporarily unavailable" in description.lower()
-                or "clear, descriptive name" in description.lower()
-                or "Research Implementation Details" in name
-                or "Performance Optimization Strategy" in name
-                or "Experimental Design Framework" in name
-                or "Technical Analysis Method" in name
-                or "Data Processing Technique" in name
-                or "Statistical Evaluation Approach" in name
+        if count == 1:
+            new_concept_data = await gemini_service.generate_additional_concept_with_gemini(
+                content=paper.content, existing_concepts=existing_concept_names
+            )
+            concepts_data = [new_concept_data] if new_concept_data else []
+        else:
+            concepts_data = await gemini_service.generate_additional_concepts_with_gemini(
+                content=paper.content, existing_concepts=existing_concept_names, n=count
             )
 
-            if is_generic:
+        if not concepts_data:
+            print(f"Failed to generate an additional concept for paper {paper_id}")
+            return {
+                "success": False,
+                "message": "Failed to generate an additional concept.",
+            }
+
+        new_concepts = []
+        for concept_data in concepts_data:
+            name = concept_data.get("name", "")
+            description = concept_data.get("description", "")
+
+            if is_generic_concept(name, description):
                 print(f"Rejected generic fallback concept: '{name}'")
-                return {
-                    "success": False,
-                    "message": "Generated concept was too generic. Please try again.",
-                }
+                continue
 
             # Create new concept object
-            new_concept = Concept(
-                id=str(uuid.uuid4()),
-                name=name,
-                description=description,
-                importance_score=new_concept_data["importance_score"],
-                page_numbers=[],
-                text_snippets=[],
-                related_concepts=[],
-                concept_type=new_concept_data.get("concept_type", "conceptual"),
+            new_concepts.append(
+                Concept(
+                    id=str(uuid.uuid4()),
+                    name=name,
+                    description=description,
+                    importance_score=concept_data["importance_score"],
+                    page_numbers=[],
+                    text_snippets=[],
+                    related_concepts=[],
+                    concept_type=concept_data.get("concept_type", "conceptual"),
+                )
             )
 
-            # Add to existing concepts (don't replace)
-            paper.concepts.append(new_concept)
-            
-            # Save to storage
-            if paper.user_id:
-                PaperStorage.save_paper(paper, paper.user_id)
-            else:
-                PaperStorage.save_paper(paper, "00000000-0000-0000-0000-000000000000")
-
-            print(f"Generated additional concept: '{new_concept.name}'")
-
+        if not new_concepts:
             return {
-                "success": True,
-                "new_concept": {
-                    "id": new_concept.id,
-                    "name": new_concept.name,
-                    "description": new_concept.description,
-                    "importance_score": new_concept.importance_score,
-                    "type": new_concept.concept_type,  # Frontend expects "type" not "concept_type"
-                },
-                "total_concepts": len(paper.concepts),
+                "success": False,
+                "message": "Generated concept was too generic. Please try again.",
             }
+
+        # Add to existing concepts (don't replace)
+        paper.concepts.extend(new_concepts)
+        
+        # Save to storage
+        if paper.user_id:
+            PaperStorage.save_paper(paper, paper.user_id)
         else:
-            print(f"Failed to generate an additional concept for paper {paper_id}")
-            return {
-                "success": False,
-                "message": "Failed to generate an additional concept.",
+            PaperStorage.save_paper(paper, "00000000-0000-0000-0000-000000000000")
+
+        print(f"Generated additional concepts: {[c.name for c in new_concepts]}")
+
+        serialized = [
+            {
+                "id": c.id,
+                "name": c.name,
+                "description": c.description,
+                "importance_score": c.importance_score,
+                "type": c.concept_type,  # Frontend expects "type" not "concept_type"
             }
+            for c in new_concepts
+        ]
+        return {
+            "success": True,
+            "new_concept": serialized[0],
+            "new_concepts": serialized,
+            "total_concepts": len(paper.concepts),
+        }
 
     except Exception as e:
         print(f"Additional concept generation failed: {e}")
@@ -526,6 +521,25 @@ async def generate_additional_concept(
         )
 
 
+def is_generic_concept(name: str, description: str) -> bool:
+    """True for empty, too-short or canned fallback concepts"""
+    return (
+        not name
+        or not description
+        or len(name) <= 3
+        or len(description) <= 10
+        or name.lower().startswith("key concept from")
+        or "temporarily unavailable" in description.lower()
+        or "clear, descriptive name" in description.lower()
+        or "Research Implementation Details" in name
+        or "Performance Optimization Strategy" in name
+        or "Experimental Design Framework" in name
+        or "Technical Analysis Method" in name
+        or "Data Processing Technique" in name
+        or "Statistical Evaluation Approach" in name
+    )
+
+
 @router.post(
     "/papers/{paper_id}/concepts/{concept_name}/implement",
 )
@@ -9,22 +9,21 @@ from typing import Dict, Any, Optional
 from pathlib import Path
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Depends, Request
 from fastapi.responses import FileResponse, StreamingResponse
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from ...core.config import settings
+from ...core.limiter import limiter
 from ...core.auth import verify_api_key, get_current_user_id
 from ...models.paper import Paper, PaperResponse, AnalysisStatus, Concept
 from ...services.pdf_parser import PDFParser
-from ...services.gemini_service import GeminiService
+from ...services.gemini_service import GeminiService, PaperContext
 from ...services.storage import PaperStorage
 from ...services.blob_storage import upload_to_blob, download_from_blob, is_blob_url
+from ...services.video_index import forget_video
+from ...middleware.rate_limit import counts_toward_daily_limit, release_video_generation
+from .analysis import is_generic_concept
 
 router = APIRouter()
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
 # Initialize services
 pdf_parser = PDFParser()
 gemini_service = GeminiService()
@@ -233,9 +232,11 @@ async def process_paper(paper_id: str):
             return
 
         paper.content = parse_result["content"]
+        # Slice the prompt-sized prefixes once for every Gemini call below
+        paper_context = PaperContext.from_content(paper.content)
 
         ai_metadata = await gemini_service.extract_paper_metadata_with_gemini(
-            paper.content
+            paper_context
         )
 
         paper.title = (
@@ -250,7 +251,7 @@ async def process_paper(paper_id: str):
         print(f"Extracting concepts for paper {paper_id}")
         try:
             concepts_data = await gemini_service.generate_concepts_with_gemini(
-                paper.content
+                paper_context
             )
 
             print(f"Raw concepts from Gemini: {len(concepts_data)} concepts")
@@ -265,24 +266,7 @@ async def process_paper(paper_id: str):
                 name = concept_data.get("name", "")
                 description = concept_data.get("description", "")
 
-                # Filter out obvious generic patterns
-                is_generic = (
-                    not name
-                    or not description
-                    or len(name) <= 3
-                    or len(description) <= 10
-                    or name.lower().startswith("key concept from")
-                    or "temporarily unavailable" in description.lower()
-                    or "clear, descriptive name" in description.lower()
-                    or "Research Implementation Details" in name
-                    or "Performance Optimization Strategy" in name
-                    or "Experimental Design Framework" in name
-                    or "Technical Analysis Method" in name
-                    or "Data Processing Technique" in name
-                    or "Statistical Evaluation Approach" in name
-                )
-
-                if not is_generic:
+                if not is_generic_concept(name, description):
                     valid_concepts_data.append(concept_data)
                     print(f"Valid concept: '{name}'")
                 else:
@@ -382,6 +366,23 @@ async def serve_pdf(
     )
 
 
+# Local concept videos are stored as their /api/videos/<name> URL
+LOCAL_VIDEO_URL_PREFIX = "/api/videos/"
+
+
+def _local_video_file(video_path: Optional[str]) -> Optional[Path]:
+    """Resolve a concept video path to the local file it refers to (None for blob URLs)"""
+    if not video_path or is_blob_url(video_path):
+        return None
+    if video_path.startswith(LOCAL_VIDEO_URL_PREFIX):
+        # From backend/app/api/endpoints/upload.py -> backend
+        backend_root = Path(__file__).resolve().parents[3]
+        if not (backend_root / "app").exists() and Path("/app").exists():
+            backend_root = Path("/app")
+        return backend_root / "videos" / os.path.basename(video_path)
+    return Path(video_path)
+
+
 @router.delete("/papers/{paper_id}")
 async def delete_paper(
     paper_id: str,
@@ -406,13 +407,19 @@ async def delete_paper(
         if paper.video_path and os.path.exists(paper.video_path):
             os.remove(paper.video_path)
         
-        # Delete concept video files
+        # Delete concept video files; the index only drops files actually removed
         for concept_video in paper.concept_videos.values():
-            if concept_video.video_path and os.path.exists(concept_video.video_path):
-                os.remove(concept_video.video_path)
+            video_file = _local_video_file(concept_video.video_path)
+            if video_file is not None and video_file.is_file():
+                os.remove(video_file)
+                await forget_video(video_file.name)
 
         # Remove from storage
         PaperStorage.delete_paper(paper_id, user_id)
+        if paper.user_id:
+            for concept_video in paper.concept_videos.values():
+                if counts_toward_daily_limit(concept_video):
+                    await release_video_generation(paper.user_id, concept_video.created_at.date())
 
         return {"message": "Paper deleted successfully"}
 
@@ -1,19 +1,29 @@
 import os
 import asyncio
-import json
+import logging
+import orjson
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request
 from pydantic import BaseModel
 from pathlib import Path
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from ...models.paper import Concept, VideoStatus, ConceptVideo
 from ...core.config import settings
+from ...core.limiter import limiter
 from ...core.auth import verify_api_key, get_current_user_id
 from ...services.storage import PaperStorage
 from ...services.blob_storage import upload_to_blob
+from ...middleware.rate_limit import (
+    record_video_generation,
+    release_video_generation,
+    counts_toward_daily_limit,
+    get_cached_daily_count,
+    cache_daily_count,
+    is_blocked,
+    mark_blocked,
+)
+from ...services.video_index import record_video
 
 # Per-user video generation limits
 DAILY_VIDEO_LIMIT = 5  # Free tier: 5 videos per day per user
@@ -24,13 +34,18 @@ MAX_CONCURRENT_GENERATIONS = 3  # Max 3 videos generating at once per user
 GLOBAL_VIDEO_SEMAPHORE = asyncio.Semaphore(2)
 
 
+logger = logging.getLogger(__name__)
+
+
+def _ws_frame(payload: Dict[str, Any]) -> str:
+    """Serialize a websocket message; orjson encodes straight to UTF-8 bytes"""
+    return orjson.dumps(payload).decode()
+
+
 manager = None
 
 router = APIRouter()
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
 
 class GenerateVideoRequest(BaseModel):
     concept_id: str = ""
@@ -144,39 +159,35 @@ async def run_agent_script(
         async for line in process.stdout:
             decoded_line = line.decode("utf-8").strip()
 
-            # Print to console for debugging
-            print(f"Agent output: {decoded_line}")
+            # Per-line trace for debugging; skipped unless DEBUG logging is on
+            logger.debug("Agent output: %s", decoded_line)
 
             if decoded_line.startswith("LOG: "):
                 log_message = decoded_line[5:]
-                print(f"Sending log via WebSocket: {log_message}")
                 if manager:
                     try:
                         await manager.send_log(
-                            paper_id, json.dumps({"type": "log", "message": log_message})
+                            paper_id, _ws_frame({"type": "log", "message": log_message})
                         )
-                        print(f"Log sent successfully")
                     except Exception as e:
-                        print(f"Error sending log: {e}")
+                        logger.warning("Error sending log: %s", e)
             elif decoded_line.startswith("PROGRESS: "):
                 progress_json = decoded_line[10:]
-                print(f"Sending progress via WebSocket: {progress_json}")
                 if manager:
                     try:
                         await manager.send_log(
-                            paper_id, json.dumps({"type": "progress", "data": json.loads(progress_json)})
+                            paper_id, _ws_frame({"type": "progress", "data": orjson.loads(progress_json)})
                         )
-                        print(f"Progress sent successfully")
                     except Exception as e:
-                        print(f"Error sending progress: {e}")
+                        logger.warning("Error sending progress: %s", e)
             elif decoded_line.startswith("CLIP_SUCCESS: "):
                 clip_path = decoded_line[14:]
                 successful_clips.append(clip_path)
             elif decoded_line.startswith("FINAL_RESULT: "):
                 result_json = decoded_line[14:]
                 try:
-                    final_result = json.loads(result_json)
-                except json.JSONDecodeError:
+                    final_result = orjson.loads(result_json)
+                except orjson.JSONDecodeError:
                     final_result = {
                         "success": False,
                         "error": "Failed to decode agent's final result.",
@@ -209,7 +220,7 @@ async def run_agent_script(
         print(f"[VIDEO] Agent error: {error_message}")
         if manager:
             await manager.send_log(
-                paper_id, json.dumps({"type": "log", "message": error_message})
+                paper_id, _ws_frame({"type": "log", "message": error_message})
             )
         return {
             "success": False,
@@ -241,7 +252,7 @@ async def generate_video_background(paper_id: str, concept_id: str, concept: Con
             concept_video.logs.append(log_entry)
             if manager:
                 await manager.send_log(
-                    paper_id, json.dumps({"type": "log", "message": log_entry})
+                    paper_id, _ws_frame({"type": "log", "message": log_entry})
                 )
 
         clips_dir = None
@@ -277,7 +288,7 @@ async def generate_video_background(paper_id: str, concept_id: str, concept: Con
 
             if not clip_paths:
                 await log("Agent did not produce any successful video clips.")
-                concept_video.status = VideoStatus.FAILED
+                await _mark_failed(concept_video, paper.user_id)
                 if paper.user_id:
                     PaperStorage.save_paper(paper, paper.user_id)
                 else:
@@ -319,6 +330,7 @@ async def generate_video_background(paper_id: str, concept_id: str, concept: Con
                 else:
                     # Fallback to local storage (keep file if Vercel Blob upload failed)
                     accessible_path = f"/api/videos/{file_name}"
+                    await record_video(file_name, final_video_path, file_size)
                     await log(f"Video available locally: {accessible_path}")
                     print(f"[VIDEO] Using local path: {accessible_path}")
 
@@ -330,7 +342,7 @@ async def generate_video_background(paper_id: str, concept_id: str, concept: Con
                     PaperStorage.save_paper(paper, "00000000-0000-0000-0000-000000000000")
             else:
                 await log("Stitching failed.")
-                concept_video.status = VideoStatus.FAILED
+                await _mark_failed(concept_video, paper.user_id)
                 if paper.user_id:
                     PaperStorage.save_paper(paper, paper.user_id)
                 else:
@@ -348,7 +360,7 @@ async def generate_video_background(paper_id: str, concept_id: str, concept: Con
 
         except Exception as e:
             await log(f"An unexpected error occurred: {e}")
-            concept_video.status = VideoStatus.FAILED
+            await _mark_failed(concept_video, paper.user_id)
             if paper.user_id:
                 PaperStorage.save_paper(paper, paper.user_id)
             else:
@@ -364,6 +376,15 @@ async def generate_video_background(paper_id: str, concept_id: str, concept: Con
                     print(f"[VIDEO] Warning: Failed to cleanup clips directory: {cleanup_err}")
 
 
+async def _mark_failed(concept_video: ConceptVideo, owner_id: Optional[str]) -> None:
+    """Mark a generation failed; it stops counting toward the owner's daily limit"""
+    day = concept_video.created_at.date()
+    counted = counts_toward_daily_limit(concept_video, day)
+    concept_video.status = VideoStatus.FAILED
+    if counted and owner_id:
+        await release_video_generation(owner_id, day)
+
+
 async def get_video_duration(video_path: str) -> float:
     """Get video duration in seconds using ffprobe"""
     try:
@@ -518,14 +539,28 @@ async def generate_video_for_concept(
 
     # Per-user rate limiting (if user_id is available)
     if user_id:
-        daily_count = PaperStorage.count_user_videos_today(user_id)
+        # Users already known to be over the limit are rejected without any I/O
+        if is_blocked(user_id):
+            raise HTTPException(
+                status_code=429,
+                detail=f"Daily limit of {DAILY_VIDEO_LIMIT} video generations reached. Try again tomorrow."
+            )
+
+        # Daily count comes from the Redis counter that record_video_generation
+        # bumps; storage is only counted on a miss
+        daily_count = await get_cached_daily_count(user_id)
+        with PaperStorage.session() as db:
+            if daily_count is None:
+                daily_count = PaperStorage.count_user_videos_today(user_id, db=db)
+                await cache_daily_count(user_id, daily_count)
+            concurrent_count = PaperStorage.count_user_concurrent_videos(user_id, db=db)
         if daily_count >= DAILY_VIDEO_LIMIT:
+            mark_blocked(user_id)
             raise HTTPException(
                 status_code=429,
                 detail=f"Daily limit of {DAILY_VIDEO_LIMIT} video generations reached. Try again tomorrow."
             )
         
-        concurrent_count = PaperStorage.count_user_concurrent_videos(user_id)
         if concurrent_count >= MAX_CONCURRENT_GENERATIONS:
             raise HTTPException(
                 status_code=429,
@@ -555,6 +590,10 @@ async def generate_video_for_concept(
     else:
         PaperStorage.save_paper(paper, "00000000-0000-0000-0000-000000000000")
     print(f"[VIDEO] Set video_status to GENERATING for concept {concept_id}, paper {paper_id}")
+    # Storage counts one video per concept under the paper's owner, so replacing
+    # a video that already counted today leaves the count unchanged
+    if user_id and paper.user_id == user_id and not counts_toward_daily_limit(existing_video):
+        await record_video_generation(user_id)
 
     background_tasks.add_task(
         generate_video_background,
@@ -619,8 +658,13 @@ async def get_usage_stats(
             "max_concurrent": MAX_CONCURRENT_GENERATIONS,
         }
     
-    today_count = PaperStorage.count_user_videos_today(user_id)
-    concurrent_count = PaperStorage.count_user_concurrent_videos(user_id)
+    # Same counter the generate endpoint enforces
+    today_count = await get_cached_daily_count(user_id)
+    with PaperStorage.session() as db:
+        if today_count is None:
+            today_count = PaperStorage.count_user_videos_today(user_id, db=db)
+            await cache_daily_count(user_id, today_count)
+        concurrent_count = PaperStorage.count_user_concurrent_videos(user_id, db=db)
     
     return {
         "daily_limit": DAILY_VIDEO_LIMIT,
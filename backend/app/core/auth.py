@@ -3,6 +3,9 @@ Authentication and authorization module - Supabase JWT
 """
 
 import os
+import hmac
+import time
+import logging
 import httpx
 from typing import Optional
 from fastapi import HTTPException, Security, Depends
@@ -13,6 +16,8 @@ from sqlalchemy.orm import Session
 from ..database import get_db, get_supabase, User
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
 # Security scheme
 security = HTTPBearer(auto_error=False)
 
@@ -142,7 +147,7 @@ async def _validate_supabase_jwt(token: str) -> bool:
     Works even when Supabase client fails to initialize.
     """
     if not settings.SUPABASE_URL or not settings.SUPABASE_ANON_KEY:
-        print("JWT validation: Supabase not configured")
+        logger.debug("JWT validation: Supabase not configured")
         return False
     
     try:
@@ -152,14 +157,14 @@ async def _validate_supabase_jwt(token: str) -> bool:
             try:
                 response = supabase.auth.get_user(token)
                 if response and response.user:
-                    print(f"JWT validation: Valid token for user {response.user.email}")
+                    logger.debug("JWT validation: valid token for user %s", response.user.email)
                     return True
             except Exception as e:
-                print(f"JWT validation: Supabase client failed: {e}")
+                logger.debug("JWT validation: Supabase client failed: %s", e)
                 # Fall through to HTTP validation
         
         # Fallback: Validate via HTTP request to Supabase
-        print(f"JWT validation: Trying HTTP validation with Supabase URL: {settings.SUPABASE_URL}")
+        logger.debug("JWT validation: trying HTTP validation with Supabase URL %s", settings.SUPABASE_URL)
         async with httpx.AsyncClient() as client:
             response = await client.get(
                 f"{settings.SUPABASE_URL}/auth/v1/user",
@@ -169,16 +174,14 @@ async def _validate_supabase_jwt(token: str) -> bool:
                 },
                 timeout=5.0
             )
-            print(f"JWT validation: HTTP response status: {response.status_code}")
+            logger.debug("JWT validation: HTTP response status %s", response.status_code)
             if response.status_code == 200:
-                print("JWT validation: Token is valid")
+                logger.debug("JWT validation: token is valid")
                 return True
             else:
-                print(f"JWT validation: Token validation failed: {response.text[:200]}")
+                logger.debug("JWT validation: token validation failed: %.200s", response.text)
     except Exception as e:
-        print(f"JWT validation error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("JWT validation error: %s", e)
     
     return False
 
@@ -186,39 +189,27 @@ async def _validate_supabase_jwt(token: str) -> bool:
 async def get_user_id_from_token(token: str) -> Optional[str]:
     """
     Extract user_id from Supabase JWT token.
-    Returns user_id if valid, None otherwise.
+    Returns user_id if the token decodes and is not expired, None otherwise.
+
+    The claims are read locally without verifying the signature - no
+    Supabase roundtrip. This is only used for optional, degrade-to-None
+    identification; routes that need a verified identity must also depend on
+    verify_api_key or get_current_user, which validate the token.
     """
     if not settings.SUPABASE_URL or not settings.SUPABASE_ANON_KEY:
         return None
-    
+
     try:
-        # Try using Supabase client first
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.auth.get_user(token)
-                if response and response.user:
-                    return response.user.id
-            except Exception:
-                pass
-        
-        # Fallback: Get user_id via HTTP request
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.SUPABASE_URL}/auth/v1/user",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "apikey": settings.SUPABASE_ANON_KEY
-                },
-                timeout=5.0
-            )
-            if response.status_code == 200:
-                user_data = response.json()
-                return user_data.get("id")
-    except Exception as e:
-        print(f"Error extracting user_id from token: {e}")
-    
-    return None
+        claims = jwt.get_unverified_claims(token)
+    except JWTError as e:
+        logger.debug("Could not decode token claims: %s", e)
+        return None
+
+    exp = claims.get("exp")
+    if exp is not None and exp < time.time():
+        return None
+
+    return claims.get("sub")
 
 
 # Legacy function for backward compatibility - now accepts both JWT and API key
@@ -241,16 +232,17 @@ async def verify_api_key(
 
     token = credentials.credentials
 
-    # First, try to validate as JWT token (Supabase)
-    if settings.SUPABASE_URL:
+    # Legacy API key first - a constant-time local compare, no Supabase roundtrip
+    if LEGACY_API_KEY and hmac.compare_digest(token.encode(), LEGACY_API_KEY.encode()):
+        return "legacy-mode"
+
+    # Then try to validate as JWT token (Supabase); anything that isn't
+    # header.payload.signature can't be one, so skip the network call
+    if settings.SUPABASE_URL and token.count(".") == 2:
         is_valid = await _validate_supabase_jwt(token)
         if is_valid:
             return "authenticated"
 
-    # Fall back to legacy API key check
-    if LEGACY_API_KEY and token == LEGACY_API_KEY:
-        return "legacy-mode"
-
     # If Supabase is configured but token is invalid, be more specific
     if settings.SUPABASE_URL:
         raise HTTPException(
@@ -272,7 +264,7 @@ async def get_current_user_id(
     Returns user_id if authenticated, None for dev/legacy mode.
     """
     if not credentials:
-        print("[AUTH] get_current_user_id: No credentials provided")
+        logger.debug("get_current_user_id: no credentials provided")
         return None
     
     token = credentials.credentials
@@ -280,10 +272,10 @@ async def get_current_user_id(
     # Try to get user_id from Supabase JWT
     if settings.SUPABASE_URL:
         user_id = await get_user_id_from_token(token)
-        print(f"[AUTH] get_current_user_id: Extracted user_id: {user_id}")
+        logger.debug("get_current_user_id: extracted user_id=%s", user_id)
         if user_id:
             return user_id
     
     # For legacy/dev mode, return None (papers won't be user-specific)
-    print("[AUTH] get_current_user_id: Returning None (no Supabase or token invalid)")
+    logger.debug("get_current_user_id: returning None (no Supabase or token invalid)")
     return None
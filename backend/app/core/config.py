@@ -17,6 +17,9 @@ class Settings(BaseSettings):
     # Gemini API Configuration
     GEMINI_API_KEY: str = ""
     GEMINI_MODEL: str = "gemini-2.5-flash"
+    GEMINI_RPM: int = 120  # Requests per minute allowed across all Gemini calls
+    GEMINI_BURST: int = 5  # Calls that may go out back to back before RPM pacing applies
+    GEMINI_MAX_CONCURRENCY: int = 4  # Max Gemini requests in flight at once
 
     # Supabase Configuration (for multi-user support)
     SUPABASE_URL: str = ""
@@ -24,6 +27,9 @@ class Settings(BaseSettings):
     SUPABASE_SERVICE_KEY: str = ""
     SUPABASE_DATABASE_URL: str = ""
 
+    # Redis (shared rate-limit counters across workers); empty = in-process only
+    REDIS_URL: str = ""
+
     # CORS Settings
     ALLOWED_HOSTS: str = "http://localhost:3000,http://127.0.0.1:3000,https://localhost:3000"
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://localhost:8000"
@@ -0,0 +1,19 @@
+"""
+Shared slowapi limiter, used by every rate-limited route
+"""
+
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from .config import settings
+
+# One instance for the whole app: slowapi counts against the storage of the
+# limiter that decorated the route. With REDIS_URL set every worker shares one
+# fixed-window counter (INCR + EXPIRE); otherwise each process counts in memory.
+# There are no default limits and no SlowAPIMiddleware - the frontend polls
+# status endpoints, so only the routes that opt in with @limiter.limit are limited.
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.REDIS_URL or "memory://",
+    strategy="fixed-window",
+)
@@ -0,0 +1,40 @@
+"""
+Shared Redis client for cross-worker state (rate limits, counters, log fan-out)
+"""
+
+from typing import Optional
+
+from .config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis is optional - everything falls back to in-process state
+    aioredis = None
+
+# Upper bound on pooled connections shared by every caller in this process
+REDIS_MAX_CONNECTIONS = 50
+
+_redis: Optional["aioredis.Redis"] = None
+
+
+def get_redis() -> Optional["aioredis.Redis"]:
+    """
+    Return the process-wide async Redis client, creating it on first use.
+    Returns None when REDIS_URL is not configured or redis is not installed.
+    """
+    global _redis
+    if _redis is None and settings.REDIS_URL and aioredis is not None:
+        _redis = aioredis.from_url(
+            settings.REDIS_URL,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            decode_responses=True,
+        )
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the shared client's connection pool (called on shutdown)"""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
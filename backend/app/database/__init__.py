@@ -1,7 +1,7 @@
 """Database package"""
 
 from .models import Base, User, Paper, Concept, VideoGeneration
-from .connection import get_db, get_supabase, init_db, supabase_client
+from .connection import get_db, get_async_db, get_supabase, init_db
 
 __all__ = [
     "Base",
@@ -10,7 +10,7 @@ __all__ = [
     "Concept",
     "VideoGeneration",
     "get_db",
+    "get_async_db",
     "get_supabase",
     "init_db",
-    "supabase_client",
 ]
@@ -2,21 +2,30 @@
 Supabase database connection and session management
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from supabase import create_client, Client
-from typing import Generator
+from typing import AsyncGenerator, Generator
 import os
+import threading
 
 from ..core.config import settings
 
 # Supabase client for auth and realtime features
-# Only create if Supabase is configured
+# Created lazily on first get_supabase() call so importing this module never
+# blocks on client construction (see get_supabase)
 supabase_client: Client | None = None
-if settings.SUPABASE_URL and settings.SUPABASE_ANON_KEY:
+_supabase_init_attempted = False
+_supabase_lock = threading.Lock()
+
+
+def _create_supabase_client() -> Client | None:
+    """Build the Supabase client, returning None if it can't be created"""
     try:
         # Try to create client, but handle version compatibility issues
-        supabase_client = create_client(
+        return create_client(
             settings.SUPABASE_URL,
             settings.SUPABASE_ANON_KEY
         )
@@ -27,11 +36,11 @@ if settings.SUPABASE_URL and settings.SUPABASE_ANON_KEY:
             print("To fix: Update supabase and httpx to compatible versions.")
         else:
             print(f"Warning: Failed to initialize Supabase client: {e}")
-        supabase_client = None
     except Exception as e:
         print(f"Warning: Failed to initialize Supabase client: {e}")
         print("Continuing without Supabase (dev mode)")
-        supabase_client = None
+    return None
+
 
 # SQLAlchemy engine for database operations
 # Use Supabase PostgreSQL if configured, otherwise SQLite for dev mode
@@ -70,15 +79,84 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+# Async engine for endpoints that must not block the event loop on queries
+# (e.g. the rate-limit counts). Created lazily so the async drivers (asyncpg /
+# aiosqlite) are only needed once something actually uses it.
+async_engine: AsyncEngine | None = None
+AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
+
+
+def _create_async_engine() -> AsyncEngine:
+    if settings.SUPABASE_DATABASE_URL:
+        url = make_url(settings.SUPABASE_DATABASE_URL).set(drivername="postgresql+asyncpg")
+        connect_args = {}
+        # asyncpg doesn't understand libpq's sslmode query parameter
+        sslmode = url.query.get("sslmode")
+        if sslmode:
+            url = url.difference_update_query(["sslmode"])
+            if sslmode != "disable":
+                connect_args["ssl"] = "require"
+        return create_async_engine(
+            url,
+            pool_pre_ping=True,
+            pool_size=20,
+            max_overflow=10,
+            pool_timeout=30,
+            connect_args=connect_args
+        )
+    return create_async_engine("sqlite+aiosqlite:///./dev.db")
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency for async database sessions.
+    The session is the connection-acquire boundary: one pooled connection per
+    request, released when the request finishes.
+
+    Usage:
+        @app.get("/items")
+        async def read_items(db: AsyncSession = Depends(get_async_db)):
+            return (await db.execute(select(Item))).scalars().all()
+    """
+    global async_engine, AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        async_engine = _create_async_engine()
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close pooled async connections (called on shutdown)"""
+    global async_engine, AsyncSessionLocal
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+        AsyncSessionLocal = None
+
+
+_initialized = False
+
+
 def init_db():
     """Initialize database tables (use Alembic for migrations in production)"""
+    global _initialized
+    if _initialized:
+        return
+
     from .models import Base
-    Base.metadata.create_all(bind=engine)
+
+    # Skip the per-table CREATE ... IF NOT EXISTS round-trips when every table
+    # already exists
+    existing_tables = set(inspect(engine).get_table_names())
+    if not set(Base.metadata.tables.keys()) <= existing_tables:
+        Base.metadata.create_all(bind=engine)
+    _initialized = True
 
 
 def get_supabase() -> Client | None:
     """
-    Get Supabase client instance.
+    Get Supabase client instance, creating it on first use.
     Returns None if Supabase is not configured.
 
     Usage:
@@ -86,4 +164,14 @@ def get_supabase() -> Client | None:
         if supabase:
             user = supabase.auth.get_user(token)
     """
+    global supabase_client, _supabase_init_attempted
+    if _supabase_init_attempted:
+        return supabase_client
+
+    with _supabase_lock:
+        # Only one thread builds the client; a failed attempt is not retried
+        if not _supabase_init_attempted:
+            if settings.SUPABASE_URL and settings.SUPABASE_ANON_KEY:
+                supabase_client = _create_supabase_client()
+            _supabase_init_attempted = True
     return supabase_client
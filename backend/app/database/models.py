@@ -2,7 +2,7 @@
 SQLAlchemy models for Supabase PostgreSQL database
 """
 
-from sqlalchemy import Column, String, Text, Float, Integer, DateTime, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, String, Text, Float, Integer, DateTime, ForeignKey, JSON, Index, Enum as SQLEnum
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
@@ -13,6 +13,11 @@ import enum
 Base = declarative_base()
 
 
+def _new_uuid() -> str:
+    """Primary keys are handled as strings (as_uuid=False) to skip uuid.UUID conversion per row"""
+    return str(uuid.uuid4())
+
+
 class AnalysisStatusEnum(str, enum.Enum):
     PENDING = "pending"
     PROCESSING = "processing"
@@ -31,7 +36,7 @@ class User(Base):
     """User model - syncs with Supabase Auth"""
     __tablename__ = "users"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=False), primary_key=True, default=_new_uuid)
     email = Column(String(255), unique=True, nullable=False, index=True)
     google_id = Column(String(255), unique=True, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -44,9 +49,13 @@ class User(Base):
 class Paper(Base):
     """Paper model - research papers uploaded by users"""
     __tablename__ = "papers"
+    __table_args__ = (
+        # GIN index for array containment lookups (authors @> / ANY); Postgres only
+        Index("ix_papers_authors_gin", "authors", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=False), primary_key=True, default=_new_uuid)
+    user_id = Column(UUID(as_uuid=False), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Metadata
     title = Column(String(500), nullable=False, default="")
@@ -79,9 +88,12 @@ class Paper(Base):
 class Concept(Base):
     """Concept model - key concepts extracted from papers"""
     __tablename__ = "concepts"
+    __table_args__ = (
+        Index("ix_concepts_related_concepts_gin", "related_concepts", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    paper_id = Column(UUID(as_uuid=True), ForeignKey("papers.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=False), primary_key=True, default=_new_uuid)
+    paper_id = Column(UUID(as_uuid=False), ForeignKey("papers.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Concept data
     name = Column(String(500), nullable=False)
@@ -103,11 +115,16 @@ class Concept(Base):
 class VideoGeneration(Base):
     """Video generation tracking - for rate limiting and history"""
     __tablename__ = "video_generations"
+    __table_args__ = (
+        # Covers the per-user usage counts (today / generating / completed) in one index scan
+        Index("ix_video_generations_user_created_status", "user_id", "created_at", "status"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    paper_id = Column(UUID(as_uuid=True), ForeignKey("papers.id", ondelete="CASCADE"), nullable=False, index=True)
-    concept_id = Column(UUID(as_uuid=True), ForeignKey("concepts.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(as_uuid=False), primary_key=True, default=_new_uuid)
+    # No standalone user_id index: ix_video_generations_user_created_status leads with it
+    user_id = Column(UUID(as_uuid=False), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    paper_id = Column(UUID(as_uuid=False), ForeignKey("papers.id", ondelete="CASCADE"), nullable=False, index=True)
+    concept_id = Column(UUID(as_uuid=False), ForeignKey("concepts.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Video data
     concept_name = Column(String(500), nullable=False)
@@ -125,3 +142,14 @@ class VideoGeneration(Base):
     user = relationship("User", back_populates="video_generations")
     paper = relationship("Paper", back_populates="video_generations")
     concept = relationship("Concept", back_populates="video_generations")
+
+
+# Partial index over in-flight rows only, so the concurrent-generation check
+# scans a handful of entries instead of every video the user ever made
+_generating = VideoGeneration.status == VideoStatusEnum.GENERATING
+Index(
+    "ix_video_generations_user_generating",
+    VideoGeneration.user_id,
+    postgresql_where=_generating,
+    sqlite_where=_generating,
+)
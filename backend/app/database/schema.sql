@@ -50,6 +50,7 @@ CREATE TABLE IF NOT EXISTS public.papers (
 -- Indexes for performance
 CREATE INDEX idx_papers_user_id ON public.papers(user_id);
 CREATE INDEX idx_papers_upload_time ON public.papers(upload_time DESC);
+CREATE INDEX ix_papers_authors_gin ON public.papers USING GIN (authors);
 
 -- Enable RLS
 ALTER TABLE public.papers ENABLE ROW LEVEL SECURITY;
@@ -87,6 +88,7 @@ CREATE TABLE IF NOT EXISTS public.concepts (
 
 -- Indexes
 CREATE INDEX idx_concepts_paper_id ON public.concepts(paper_id);
+CREATE INDEX ix_concepts_related_concepts_gin ON public.concepts USING GIN (related_concepts);
 
 -- Enable RLS
 ALTER TABLE public.concepts ENABLE ROW LEVEL SECURITY;
@@ -151,10 +153,11 @@ CREATE TABLE IF NOT EXISTS public.video_generations (
     CONSTRAINT fk_concept FOREIGN KEY (concept_id) REFERENCES public.concepts(id) ON DELETE CASCADE
 );
 
--- Indexes for rate limiting queries
-CREATE INDEX idx_video_generations_user_id ON public.video_generations(user_id);
+-- Indexes for rate limiting queries. (user_id, created_at, status) also serves
+-- plain user_id and user_id + created_at lookups, so those get no index of their own.
 CREATE INDEX idx_video_generations_created_at ON public.video_generations(created_at DESC);
-CREATE INDEX idx_video_generations_user_date ON public.video_generations(user_id, created_at DESC);
+CREATE INDEX idx_video_generations_user_date_status ON public.video_generations(user_id, created_at, status);
+CREATE INDEX idx_video_generations_user_generating ON public.video_generations(user_id) WHERE status = 'generating';
 
 -- Enable RLS
 ALTER TABLE public.video_generations ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,26 @@
+-- Clarifai index upgrade for databases created before the index changes
+-- schema.sql only affects fresh installs and init_db skips create_all once the
+-- tables exist, so run this once against an existing database. Safe to re-run.
+-- CONCURRENTLY can't run inside a transaction block: use psql
+-- (psql "$SUPABASE_DATABASE_URL" -f upgrade_indexes.sql) or run the statements
+-- one at a time in the Supabase SQL Editor.
+
+-- GIN indexes for array membership lookups (same names either way)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_papers_authors_gin ON public.papers USING GIN (authors);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_concepts_related_concepts_gin ON public.concepts USING GIN (related_concepts);
+
+-- Rate limiting indexes: the composite and the partial index on in-flight
+-- generations replace the old user_id and (user_id, created_at) indexes.
+-- New ones are built before the old are dropped so lookups always have an index.
+-- Run only the section matching how the database was created.
+
+-- Database created from schema.sql (enum stores lowercase values)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_video_generations_user_date_status ON public.video_generations(user_id, created_at, status);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_video_generations_user_generating ON public.video_generations(user_id) WHERE status = 'generating';
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_video_generations_user_id;
+DROP INDEX CONCURRENTLY IF EXISTS public.idx_video_generations_user_date;
+
+-- Database created by init_db / create_all (SQLAlchemy names, enum stores member names)
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_video_generations_user_created_status ON public.video_generations(user_id, created_at, status);
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_video_generations_user_generating ON public.video_generations(user_id) WHERE status = 'GENERATING';
+-- DROP INDEX CONCURRENTLY IF EXISTS public.ix_video_generations_user_id;
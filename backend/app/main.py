@@ -1,84 +1,281 @@
 import os
 import json
+import orjson
 import asyncio
+import logging
+import logging.handlers
+from queue import SimpleQueue
 from pathlib import Path
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from .api.endpoints import upload, analysis, video
 from .core.config import settings
+from .core.redis_client import get_redis, close_redis
+from .core.limiter import limiter
+from .services.blob_storage import close_blob_client
+from .services.video_index import list_videos, rebuild_index, scan_videos
+from .database.connection import dispose_async_engine
+
+# Debug-level trace lines (auth, websocket bookkeeping) are skipped before
+# formatting unless DEBUG is enabled. Records are handed to a QueueHandler and
+# written to stderr by a listener thread, so the event loop never blocks on
+# the stream write.
+_log_queue: SimpleQueue = SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler(), respect_handler_level=True)
+logging.basicConfig(
+    level=logging.DEBUG if settings.DEBUG else logging.INFO,
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
+)
+_log_listener.start()
+logger = logging.getLogger(__name__)
+
+
+# Max pending log messages per paper before the oldest are dropped
+LOG_QUEUE_SIZE = 100
+
+# After the first pending message arrives, wait this long so a burst of agent
+# output goes out as one websocket frame instead of one frame per line
+LOG_FLUSH_INTERVAL = 0.02
+
+# Static websocket frames, serialized once at import. They stay text frames:
+# the frontend JSON.parses event.data, which a binary frame would break.
+_CONNECTED = orjson.dumps({"type": "connected", "message": "Connected to logs"}).decode()
+_PONG = orjson.dumps({"type": "pong"}).decode()
+
+# Redis pub/sub channel prefix for per-paper log fan-out across workers
+LOG_CHANNEL_PREFIX = "logs:"
+
+
+def _log_channel(paper_id: str) -> str:
+    return LOG_CHANNEL_PREFIX + paper_id
+
+
+async def _safe_close(websocket: WebSocket):
+    try:
+        await websocket.close()
+    except Exception:
+        pass
 
 
 class ConnectionManager:
+    """
+    Per-worker registry of log websockets.
+
+    With Redis configured, send_log publishes to a logs:<paper_id> channel and
+    every worker forwards messages for the sockets it owns, so background jobs
+    can push logs from any worker. Without Redis it delivers in-process only.
+    """
+
     def __init__(self):
         self.active_connections: dict[str, WebSocket] = {}
+        self.queues: dict[str, asyncio.Queue] = {}
+        self.drain_tasks: dict[str, asyncio.Task] = {}
+        self._pubsub = None
+        self._pubsub_task: asyncio.Task | None = None
+        # Serializes reconnects for the same paper without blocking other papers.
+        # A lock is dropped once no connect() holds or waits on it (counted in
+        # _lock_users), so random paper ids can't grow the dict without bound.
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._lock_users: dict[str, int] = {}
 
     async def connect(self, paper_id: str, websocket: WebSocket):
         await websocket.accept()
-        # If there's already a connection for this paper, close it first
-        if paper_id in self.active_connections:
-            try:
-                old_ws = self.active_connections[paper_id]
-                await old_ws.close()
-            except:
-                pass
+        lock = self._locks.get(paper_id)
+        if lock is None:
+            lock = self._locks[paper_id] = asyncio.Lock()
+        self._lock_users[paper_id] = self._lock_users.get(paper_id, 0) + 1
+        try:
+            async with lock:
+                await self._connect_locked(paper_id, websocket)
+        finally:
+            self._lock_users[paper_id] -= 1
+            if self._lock_users[paper_id] == 0:
+                del self._lock_users[paper_id]
+                del self._locks[paper_id]
+        logger.debug("ConnectionManager: connected paper %s, total connections: %d", paper_id, len(self.active_connections))
+
+    async def _connect_locked(self, paper_id: str, websocket: WebSocket):
+        # If there's already a connection for this paper, close it in the
+        # background so a slow peer can't stall the reconnect
+        old_ws = self.active_connections.get(paper_id)
+        if old_ws is not None:
+            self._stop_drain(paper_id)
+            asyncio.create_task(_safe_close(old_ws))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=LOG_QUEUE_SIZE)
         self.active_connections[paper_id] = websocket
-        print(f"ConnectionManager: Connected paper {paper_id}, total connections: {len(self.active_connections)}")
+        self.queues[paper_id] = queue
+        self.drain_tasks[paper_id] = asyncio.create_task(self._drain(paper_id, websocket, queue))
+        await self._subscribe(paper_id)
 
-    def disconnect(self, paper_id: str):
+    def disconnect(self, paper_id: str, websocket: WebSocket | None = None):
+        # A replaced socket's cleanup must not tear down its successor
+        if websocket is not None and self.active_connections.get(paper_id) is not websocket:
+            return
         if paper_id in self.active_connections:
             del self.active_connections[paper_id]
-            print(f"ConnectionManager: Disconnected paper {paper_id}, remaining connections: {len(self.active_connections)}")
+            self._stop_drain(paper_id)
+            if self._pubsub is not None:
+                asyncio.create_task(self._unsubscribe(paper_id))
+            logger.debug("ConnectionManager: disconnected paper %s, remaining connections: %d", paper_id, len(self.active_connections))
 
-    async def send_log(self, paper_id: str, message: str):
-        if paper_id in self.active_connections:
+    def _stop_drain(self, paper_id: str):
+        self.queues.pop(paper_id, None)
+        task = self.drain_tasks.pop(paper_id, None)
+        if task:
+            task.cancel()
+
+    async def _drain(self, paper_id: str, websocket: WebSocket, queue: asyncio.Queue):
+        """Forward queued log messages to the socket so producers never wait on client I/O"""
+        while True:
+            batch = [await queue.get()]
+            await asyncio.sleep(LOG_FLUSH_INTERVAL)
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            # Messages are already-serialized JSON, so a batch frame is built by
+            # joining them rather than decoding and re-encoding each one
+            frame = batch[0] if len(batch) == 1 else '{"type":"batch","messages":[' + ",".join(batch) + "]}"
             try:
-                ws = self.active_connections[paper_id]
-                await ws.send_text(message)
+                await websocket.send_text(frame)
             except Exception as e:
-                print(f"Error sending log to {paper_id}: {e}")
+                logger.warning("Error sending log to %s: %s", paper_id, e)
                 # Don't remove connection on error - let it retry
 
+    def _enqueue(self, paper_id: str, message: str):
+        queue = self.queues.get(paper_id)
+        if queue is None:
+            return
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow client: drop the oldest pending message to make room
+            queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def _subscribe(self, paper_id: str):
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            if self._pubsub is None:
+                # One pubsub connection per worker, shared by all of its sockets
+                self._pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            await self._pubsub.subscribe(_log_channel(paper_id))
+            if self._pubsub_task is None or self._pubsub_task.done():
+                self._pubsub_task = asyncio.create_task(self._listen())
+        except Exception as e:
+            logger.warning("Redis subscribe failed for %s, using local delivery: %s", paper_id, e)
+
+    async def _unsubscribe(self, paper_id: str):
+        # A reconnect may have re-registered the paper before this ran
+        if paper_id in self.active_connections or self._pubsub is None:
+            return
+        try:
+            await self._pubsub.unsubscribe(_log_channel(paper_id))
+        except Exception as e:
+            logger.warning("Redis unsubscribe failed for %s: %s", paper_id, e)
+
+    async def _listen(self):
+        """Route published log messages to the local socket queues"""
+        prefix_len = len(LOG_CHANNEL_PREFIX)
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except Exception as e:
+                logger.warning("Redis log listener error: %s", e)
+                await asyncio.sleep(1.0)
+                continue
+            if message is None:
+                if not self._pubsub.subscribed:
+                    # Every socket on this worker is gone; don't spin
+                    await asyncio.sleep(1.0)
+                continue
+            self._enqueue(message["channel"][prefix_len:], message["data"])
+
+    async def send_log(self, paper_id: str, message: str):
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.publish(_log_channel(paper_id), message)
+                return
+            except Exception as e:
+                logger.warning("Redis publish failed for %s, delivering locally: %s", paper_id, e)
+        self._enqueue(paper_id, message)
+
+    async def close(self):
+        if self._pubsub_task is not None:
+            self._pubsub_task.cancel()
+            self._pubsub_task = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                pass
+            self._pubsub = None
+
 
 app = FastAPI()
 
-# Rate limiting
-limiter = Limiter(key_func=get_remote_address, default_limits=["100/hour"])
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+
+@app.on_event("startup")
+async def startup_redis():
+    app.state.redis = get_redis()
+    await rebuild_index(videos_dir)
+
+
+@app.on_event("shutdown")
+async def shutdown_clients():
+    await manager.close()
+    await close_redis()
+    await close_blob_client()
+    await dispose_async_engine()
+    _log_listener.stop()
+
 # CORS middleware - use settings for proper origin parsing
 # Parse ALLOWED_ORIGINS from environment variable (supports JSON arrays or comma-separated)
 allowed_origins_env = os.getenv("ALLOWED_ORIGINS", settings.ALLOWED_ORIGINS)
 if not allowed_origins_env:
     allowed_origins_env = "http://localhost:3000,http://localhost:8000"
 
-# Try to parse as JSON first (in case it's stored as JSON string)
-try:
-    import json
-    if allowed_origins_env.strip().startswith("["):
-        allowed_origins = json.loads(allowed_origins_env)
-    else:
-        # Split by comma
-        allowed_origins = [origin.strip().strip('"').strip("'") for origin in allowed_origins_env.split(",") if origin.strip()]
-except (json.JSONDecodeError, ValueError):
-    # Fallback to comma-separated
-    allowed_origins = [origin.strip().strip('"').strip("'") for origin in allowed_origins_env.split(",") if origin.strip()]
+
+def _parse_origins(value: str) -> list[str]:
+    # Try to parse as JSON first (in case it's stored as JSON string)
+    if value.strip().startswith("["):
+        try:
+            return json.loads(value)
+        except (json.JSONDecodeError, ValueError):
+            pass
+    # Otherwise (or as fallback) split by comma
+    return [origin.strip().strip('"').strip("'") for origin in value.split(",") if origin.strip()]
+
+
+# Parsed once at import; a frozenset makes Starlette's per-request
+# "origin in allow_origins" check a hash lookup instead of a list scan
+allowed_origins = frozenset(origin.lower() for origin in _parse_origins(allowed_origins_env))
 
 if not allowed_origins:
-    allowed_origins = ["*"]  # Allow all in development if not set
+    # A "*" wildcard is invalid together with allow_credentials, so fall back
+    # to the local dev origins instead
+    allowed_origins = frozenset(("http://localhost:3000", "http://localhost:8000"))
 
-print(f"[CORS] Allowed origins: {allowed_origins}")
+# Explicit lists let Starlette answer preflights from fixed sets instead of
+# mirroring whatever the browser requested
+CORS_ALLOW_METHODS = ("GET", "POST", "PUT", "DELETE", "OPTIONS")
+CORS_ALLOW_HEADERS = ("Authorization", "Content-Type", "X-API-Key")
+
+print(f"[CORS] Allowed origins: {sorted(allowed_origins)}")
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=CORS_ALLOW_METHODS,
+    allow_headers=CORS_ALLOW_HEADERS,
     expose_headers=["*"],
 )
 
@@ -92,57 +289,78 @@ async def health_check():
     return {"status": "healthy"}
 
 
+# Seconds a /debug/videos listing is reused before the directory is rescanned
+DEBUG_VIDEOS_TTL = 5.0
+_debug_videos_cache: tuple[float, dict] | None = None
+
+
+def _list_videos() -> dict:
+    """Blocking directory scan; DirEntry caches file type and stat info from the scan"""
+    files = scan_videos(videos_dir)
+    return {
+        "videos_dir": str(videos_dir),
+        "exists": True,
+        "files": files,
+        "total_files": len(files)
+    }
+
+
 @app.get("/debug/videos")
 async def debug_videos():
     """Debug endpoint to list videos directory contents"""
-    try:
-        files = list(videos_dir.glob("*"))
+    global _debug_videos_cache
+    # With Redis, videos are indexed when they're written; no directory walk.
+    # An empty index falls back to the cached scan below.
+    indexed = await list_videos()
+    if indexed:
         return {
             "videos_dir": str(videos_dir),
             "exists": videos_dir.exists(),
-            "files": [{"name": f.name, "size": f.stat().st_size, "path": str(f)} for f in files if f.is_file()],
-            "total_files": len([f for f in files if f.is_file()])
+            "files": indexed,
+            "total_files": len(indexed),
+            "source": "index"
         }
+
+    now = asyncio.get_running_loop().time()
+    if _debug_videos_cache is not None and now - _debug_videos_cache[0] < DEBUG_VIDEOS_TTL:
+        return _debug_videos_cache[1]
+    try:
+        result = await asyncio.to_thread(_list_videos)
+    except FileNotFoundError:
+        result = {"videos_dir": str(videos_dir), "exists": False, "files": [], "total_files": 0}
     except Exception as e:
         return {"error": str(e), "videos_dir": str(videos_dir)}
+    _debug_videos_cache = (now, result)
+    return result
 
 
 @app.websocket("/ws/papers/{paper_id}/logs")
 async def websocket_endpoint(websocket: WebSocket, paper_id: str):
     await manager.connect(paper_id, websocket)
-    print(f"WebSocket connected for paper {paper_id}")
+    logger.info("WebSocket connected for paper %s", paper_id)
     try:
         # Send initial connection message
-        await websocket.send_text(json.dumps({"type": "connected", "message": "Connected to logs"}))
+        await websocket.send_text(_CONNECTED)
         
         # Keep connection alive - just wait for disconnection
         # Don't require client to send messages, just keep the connection open
-        # The manager will send logs as they come in from the agent
+        # The manager will send logs as they come in from the agent.
+        # Idle keepalive is handled by uvicorn's protocol-level ping/pong
+        # (--ws-ping-interval / --ws-ping-timeout), so no Python wakeups here.
         while True:
             try:
-                # Wait for client disconnect or a message (but don't require messages)
-                # Use a long timeout so we can keep the connection open
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=300.0)
-                # If client sends "ping", respond with "pong"
-                if data == "ping":
-                    await websocket.send_text(json.dumps({"type": "pong"}))
-            except asyncio.TimeoutError:
-                # Connection is still alive, just send a keepalive and continue
-                try:
-                    await websocket.send_text(json.dumps({"type": "keepalive"}))
-                except Exception as e:
-                    print(f"Error sending keepalive, connection likely closed: {e}")
-                    break
+                data = await websocket.receive_text()
             except WebSocketDisconnect:
-                print(f"WebSocket disconnected for paper {paper_id}")
+                logger.info("WebSocket disconnected for paper %s", paper_id)
                 break
-    except Exception as e:
-        print(f"WebSocket error for paper {paper_id}: {e}")
-        import traceback
-        traceback.print_exc()
+            # If client sends "ping", respond with "pong"
+            if data == "ping":
+                await websocket.send_text(_PONG)
+    except Exception:
+        logger.exception("WebSocket error for paper %s", paper_id)
     finally:
-        manager.disconnect(paper_id)
-        print(f"WebSocket cleaned up for paper {paper_id}")
+        manager.disconnect(paper_id, websocket)
+        logger.debug("WebSocket cleaned up for paper %s", paper_id)
 
 
 # --- THIS IS THE DEFINITIVE PATHING FIX ---
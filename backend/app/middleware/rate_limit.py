@@ -2,23 +2,163 @@
 Rate limiting middleware for per-user video generation limits
 """
 
-from datetime import datetime, date
+import time
+from collections import OrderedDict
+from datetime import datetime, date, timedelta
+from typing import Optional
 from fastapi import HTTPException, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 
-from ..database import get_db, VideoGeneration, User
+from ..database import get_async_db, VideoGeneration, User
 from ..core.auth import get_current_user
+from ..core.redis_client import get_redis
+from ..models.paper import VideoStatus, ConceptVideo
 
 
 # Configuration
 DAILY_VIDEO_LIMIT = 5  # Free tier: 5 videos per day
 MAX_CONCURRENT_GENERATIONS = 3  # Max 3 videos generating at once per user
 
+# Status values used in the count filters, resolved once
+_STATUS_GENERATING = VideoStatus.GENERATING.value
+_STATUS_COMPLETED = VideoStatus.COMPLETED.value
+
+# A video counts toward the daily limit while it is generating or once it has
+# completed, one per concept (PaperStorage.count_user_videos_today). The Redis
+# counter follows the same rule: bumped when a start adds such a video, dropped
+# when one fails or is deleted.
+_COUNTED_STATUSES = (_STATUS_COMPLETED, _STATUS_GENERATING)
+
+
+# Per-process L1 cache of users already over the daily limit: user_id -> time
+# the block lifts (next midnight, or BLOCKED_TTL if sooner, since a failed or
+# deleted video on another worker can free up quota). Checked before Redis/SQL
+# so repeat requests from a blocked user are rejected without any I/O.
+# Bounded as an LRU.
+BLOCKED_CACHE_SIZE = 10_000
+BLOCKED_TTL = 60
+_blocked: "OrderedDict[str, float]" = OrderedDict()
+
+
+def is_blocked(user_id: str) -> bool:
+    blocked_until = _blocked.get(user_id)
+    if blocked_until is None:
+        return False
+    if time.time() >= blocked_until:
+        del _blocked[user_id]
+        return False
+    return True
+
+
+def mark_blocked(user_id: str) -> None:
+    _blocked[user_id] = time.time() + min(BLOCKED_TTL, _seconds_until_midnight(date.today()))
+    _blocked.move_to_end(user_id)
+    if len(_blocked) > BLOCKED_CACHE_SIZE:
+        _blocked.popitem(last=False)
+
+
+def _daily_count_key(user_id: str, today: date) -> str:
+    return f"vid:daily:{user_id}:{today.isoformat()}"
+
+
+def _seconds_until_midnight(today: date) -> int:
+    midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+    return max(1, int((midnight - datetime.now()).total_seconds()))
+
+
+async def get_cached_daily_count(user_id: str) -> Optional[int]:
+    """Today's video count for the user from Redis, or None when it isn't cached"""
+    redis = get_redis()
+    if redis is None:
+        return None
+    try:
+        cached = await redis.get(_daily_count_key(user_id, date.today()))
+    except Exception as e:
+        print(f"Warning: Redis daily count lookup failed: {e}")
+        return None
+    return int(cached) if cached is not None else None
+
+
+async def cache_daily_count(user_id: str, count: int) -> None:
+    """Store a freshly computed daily count until midnight (unless one is already cached)"""
+    redis = get_redis()
+    if redis is None:
+        return
+    today = date.today()
+    try:
+        await redis.set(_daily_count_key(user_id, today), count, ex=_seconds_until_midnight(today), nx=True)
+    except Exception as e:
+        print(f"Warning: Redis daily count store failed: {e}")
+
+
+async def _get_daily_video_count(user_id: str, db: AsyncSession) -> int:
+    """
+    Count videos the user started today.
+    Served from Redis when available; the SQL count only runs on a cache miss
+    and is stored until midnight.
+    """
+    cached = await get_cached_daily_count(user_id)
+    if cached is not None:
+        return cached
+
+    today_start = datetime.combine(date.today(), datetime.min.time())
+    count = (await db.execute(
+        select(func.count(VideoGeneration.id))
+        .where(VideoGeneration.user_id == user_id)
+        .where(VideoGeneration.created_at >= today_start)
+        .where(VideoGeneration.status.in_(_COUNTED_STATUSES))
+    )).scalar() or 0
+
+    await cache_daily_count(user_id, count)
+    return count
+
+
+def counts_toward_daily_limit(video: Optional[ConceptVideo], day: Optional[date] = None) -> bool:
+    """Whether a concept video is part of the daily count for `day` (default today)"""
+    if video is None or video.status.value not in _COUNTED_STATUSES:
+        return False
+    return video.created_at.date() == (day or date.today())
+
+
+async def record_video_generation(user_id: str) -> None:
+    """
+    Bump the cached daily count after a start adds a counted video.
+    If nothing was cached yet, the key is dropped again so the next check
+    recomputes it from the database instead of trusting a partial count.
+    """
+    redis = get_redis()
+    if redis is None:
+        return
+    key = _daily_count_key(user_id, date.today())
+    try:
+        if await redis.incr(key) == 1:
+            await redis.delete(key)
+    except Exception as e:
+        print(f"Warning: Redis daily count increment failed: {e}")
+
+
+async def release_video_generation(user_id: str, day: date) -> None:
+    """
+    Drop a video from the cached count for `day` once it no longer counts
+    (generation failed or the paper was deleted). A missing key is left
+    missing, so the next check recomputes it.
+    """
+    _blocked.pop(user_id, None)
+    redis = get_redis()
+    if redis is None:
+        return
+    key = _daily_count_key(user_id, day)
+    try:
+        if await redis.decr(key) < 0:
+            await redis.delete(key)
+    except Exception as e:
+        print(f"Warning: Redis daily count decrement failed: {e}")
+
 
 async def check_daily_video_limit(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> None:
     """
     Check if user has exceeded daily video generation limit.
@@ -26,16 +166,17 @@ async def check_daily_video_limit(
     Raises:
         HTTPException: 429 if limit exceeded
     """
-    today = date.today()
-    today_start = datetime.combine(today, datetime.min.time())
+    if is_blocked(current_user.id):
+        raise HTTPException(
+            status_code=429,
+            detail=f"Daily limit of {DAILY_VIDEO_LIMIT} video generations reached. Try again tomorrow."
+        )
 
     # Count videos generated today
-    count = db.query(func.count(VideoGeneration.id))\
-        .filter(VideoGeneration.user_id == current_user.id)\
-        .filter(VideoGeneration.created_at >= today_start)\
-        .scalar()
+    count = await _get_daily_video_count(current_user.id, db)
 
     if count >= DAILY_VIDEO_LIMIT:
+        mark_blocked(current_user.id)
         raise HTTPException(
             status_code=429,
             detail=f"Daily limit of {DAILY_VIDEO_LIMIT} video generations reached. Try again tomorrow."
@@ -44,7 +185,7 @@ async def check_daily_video_limit(
 
 async def check_concurrent_video_limit(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> None:
     """
     Check if user has too many videos currently generating.
@@ -52,13 +193,12 @@ async def check_concurrent_video_limit(
     Raises:
         HTTPException: 429 if too many concurrent generations
     """
-    from ..models.paper import VideoStatus
-
     # Count currently generating videos
-    count = db.query(func.count(VideoGeneration.id))\
-        .filter(VideoGeneration.user_id == current_user.id)\
-        .filter(VideoGeneration.status == VideoStatus.GENERATING.value)\
-        .scalar()
+    count = (await db.execute(
+        select(func.count(VideoGeneration.id))
+        .where(VideoGeneration.user_id == current_user.id)
+        .where(VideoGeneration.status == _STATUS_GENERATING)
+    )).scalar()
 
     if count >= MAX_CONCURRENT_GENERATIONS:
         raise HTTPException(
@@ -69,7 +209,7 @@ async def check_concurrent_video_limit(
 
 async def get_remaining_daily_videos(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> int:
     """
     Get number of remaining video generations for today.
@@ -77,13 +217,7 @@ async def get_remaining_daily_videos(
     Returns:
         int: Number of videos left (0 to DAILY_VIDEO_LIMIT)
     """
-    today = date.today()
-    today_start = datetime.combine(today, datetime.min.time())
-
-    count = db.query(func.count(VideoGeneration.id))\
-        .filter(VideoGeneration.user_id == current_user.id)\
-        .filter(VideoGeneration.created_at >= today_start)\
-        .scalar()
+    count = await _get_daily_video_count(current_user.id, db)
 
     remaining = max(0, DAILY_VIDEO_LIMIT - count)
     return remaining
@@ -91,7 +225,7 @@ async def get_remaining_daily_videos(
 
 async def get_user_usage_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> dict:
     """
     Get comprehensive usage statistics for the current user.
@@ -102,29 +236,18 @@ async def get_user_usage_stats(
     today = date.today()
     today_start = datetime.combine(today, datetime.min.time())
 
-    # Today's count
-    today_count = db.query(func.count(VideoGeneration.id))\
-        .filter(VideoGeneration.user_id == current_user.id)\
-        .filter(VideoGeneration.created_at >= today_start)\
-        .scalar()
-
-    # Total count
-    total_count = db.query(func.count(VideoGeneration.id))\
-        .filter(VideoGeneration.user_id == current_user.id)\
-        .scalar()
-
-    # Currently generating
-    from ..models.paper import VideoStatus
-    generating_count = db.query(func.count(VideoGeneration.id))\
-        .filter(VideoGeneration.user_id == current_user.id)\
-        .filter(VideoGeneration.status == VideoStatus.GENERATING.value)\
-        .scalar()
-
-    # Completed videos
-    completed_count = db.query(func.count(VideoGeneration.id))\
-        .filter(VideoGeneration.user_id == current_user.id)\
-        .filter(VideoGeneration.status == VideoStatus.COMPLETED.value)\
-        .scalar()
+    # All four counts in one round-trip via conditional aggregation
+    total_count, today_count, generating_count, completed_count = (await db.execute(
+        select(
+            func.count(VideoGeneration.id),
+            func.count(VideoGeneration.id).filter(
+                VideoGeneration.created_at >= today_start,
+                VideoGeneration.status.in_(_COUNTED_STATUSES),
+            ),
+            func.count(VideoGeneration.id).filter(VideoGeneration.status == _STATUS_GENERATING),
+            func.count(VideoGeneration.id).filter(VideoGeneration.status == _STATUS_COMPLETED),
+        ).where(VideoGeneration.user_id == current_user.id)
+    )).one()
 
     return {
         "daily_limit": DAILY_VIDEO_LIMIT,
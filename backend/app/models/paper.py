@@ -42,21 +42,20 @@ class Concept(BaseModel):
     page_numbers: List[int] = []
     text_snippets: List[str] = []
     related_concepts: List[str] = []
-    concept_type: str = "conceptual"
+    # Serialized as 'type' for frontend compatibility; the rename happens in
+    # pydantic's compiled serializer rather than a per-call dict pop
+    concept_type: str = Field(default="conceptual", serialization_alias="type")
     code: Optional[str] = None  # Generated Python code implementation
     
     def model_dump(self, **kwargs):
         """Override model_dump to use 'type' instead of 'concept_type' for frontend compatibility"""
-        data = super().model_dump(**kwargs)
-        if 'concept_type' in data:
-            data['type'] = data.pop('concept_type')
-        return data
+        kwargs.setdefault("by_alias", True)
+        return super().model_dump(**kwargs)
     
     def model_dump_json(self, **kwargs):
         """Override model_dump_json to use 'type' instead of 'concept_type'"""
-        import json
-        data = self.model_dump(**kwargs)
-        return json.dumps(data, default=str)
+        kwargs.setdefault("by_alias", True)
+        return super().model_dump_json(**kwargs)
 
 
 class Paper(BaseModel):
@@ -3,9 +3,12 @@ Vercel Blob storage helper functions for PDFs and other files
 """
 
 import os
+import asyncio
 from typing import Optional
 from pathlib import Path
 import tempfile
+import aiofiles
+import httpx
 
 # Vercel Blob storage (optional, falls back to local storage)
 try:
@@ -14,7 +17,61 @@ try:
 except ImportError:
     VERCEL_BLOB_AVAILABLE = False
 
-async def upload_to_blob(file_path: str, file_name: str) -> Optional[str]:
+# The vercel_blob package needs the whole body in memory, so only use it for
+# small files; anything larger is streamed from disk to the REST API
+PACKAGE_UPLOAD_MAX_BYTES = 1024 * 1024
+TRANSFER_CHUNK_SIZE = 1024 * 1024
+
+
+# Shared client so repeated blob transfers reuse pooled TCP/TLS connections
+# instead of handshaking with blob.vercel-storage.com on every call
+_blob_client: Optional[httpx.AsyncClient] = None
+
+
+def get_blob_client() -> httpx.AsyncClient:
+    """Return the process-wide blob HTTP client, creating it on first use"""
+    global _blob_client
+    if _blob_client is None or _blob_client.is_closed:
+        _blob_client = httpx.AsyncClient(
+            timeout=300.0,  # 5 min timeout for large files
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        )
+    return _blob_client
+
+
+async def close_blob_client() -> None:
+    """Close the shared blob client (called on shutdown)"""
+    global _blob_client
+    if _blob_client is not None:
+        await _blob_client.aclose()
+        _blob_client = None
+
+
+async def _iter_file(file_path: str):
+    async with aiofiles.open(file_path, "rb") as f:
+        while chunk := await f.read(TRANSFER_CHUNK_SIZE):
+            yield chunk
+
+
+def _package_upload(file_path: str, file_name: str, blob_token: str) -> str:
+    with open(file_path, "rb") as f:
+        file_data = f.read()
+    blob = vercel_put(
+        pathname=file_name,
+        body=file_data,
+        options={
+            "access": "public",
+            "token": blob_token,
+        }
+    )
+    return blob.get("url") if isinstance(blob, dict) else blob.url
+
+
+async def upload_to_blob(
+    file_path: str,
+    file_name: str,
+    client: Optional[httpx.AsyncClient] = None
+) -> Optional[str]:
     """Upload any file to Vercel Blob storage and return the URL"""
     blob_token = os.getenv("BLOB_READ_WRITE_TOKEN")
     if not blob_token:
@@ -23,58 +80,46 @@ async def upload_to_blob(file_path: str, file_name: str) -> Optional[str]:
 
     try:
         print(f"[BLOB] Uploading {file_name} to Vercel Blob...")
+        # Size is needed either way: it picks the upload path and is sent as
+        # Content-Length when streaming
         file_size = os.path.getsize(file_path)
         print(f"[BLOB] File size: {file_size / (1024*1024):.2f} MB")
         
-        # Read file data
-        with open(file_path, "rb") as f:
-            file_data = f.read()
-
-        # Try using vercel_blob package first (if available)
-        if VERCEL_BLOB_AVAILABLE:
+        # Try using vercel_blob package first (if available) for small files.
+        # The file is only opened here, and the package is synchronous, so the
+        # read and the request run in a worker thread.
+        if VERCEL_BLOB_AVAILABLE and file_size <= PACKAGE_UPLOAD_MAX_BYTES:
             try:
-                blob = vercel_put(
-                    pathname=file_name,
-                    body=file_data,
-                    options={
-                        "access": "public",
-                        "token": blob_token,
-                    }
-                )
-                blob_url = blob.get("url") if isinstance(blob, dict) else blob.url
+                blob_url = await asyncio.to_thread(_package_upload, file_path, file_name, blob_token)
                 print(f"[BLOB] Upload successful (package): {blob_url}")
                 return blob_url
             except Exception as package_err:
                 print(f"[BLOB] Package upload failed: {package_err}, trying REST API...")
         
         # Fallback to REST API using httpx
-        import httpx
-        
-        async with httpx.AsyncClient(timeout=300.0) as client:  # 5 min timeout for large files
-            response = await client.put(
-                f"https://blob.vercel-storage.com/{file_name}",
-                headers={
-                    "Authorization": f"Bearer {blob_token}",
-                    "Content-Type": "application/octet-stream",
-                },
-                params={
-                    "access": "public",
-                },
-                content=file_data
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                blob_url = result.get("url")
-                print(f"[BLOB] Upload successful (REST API): {blob_url}")
-                return blob_url
-            else:
-                print(f"[BLOB] REST API upload failed with status {response.status_code}: {response.text[:500]}")
-                return None
-                
-    except ImportError:
-        print("[BLOB] httpx not available, cannot upload")
-        return None
+        client = client or get_blob_client()
+        response = await client.put(
+            f"https://blob.vercel-storage.com/{file_name}",
+            headers={
+                "Authorization": f"Bearer {blob_token}",
+                "Content-Type": "application/octet-stream",
+                "Content-Length": str(file_size),
+            },
+            params={
+                "access": "public",
+            },
+            content=_iter_file(file_path)
+        )
+
+        if response.status_code == 200:
+            result = response.json()
+            blob_url = result.get("url")
+            print(f"[BLOB] Upload successful (REST API): {blob_url}")
+            return blob_url
+        else:
+            print(f"[BLOB] REST API upload failed with status {response.status_code}: {response.text[:500]}")
+            return None
+
     except Exception as e:
         print(f"[BLOB] Upload failed: {e}")
         import traceback
@@ -82,29 +127,36 @@ async def upload_to_blob(file_path: str, file_name: str) -> Optional[str]:
         return None
 
 
-async def download_from_blob(blob_url: str) -> Optional[str]:
+async def download_from_blob(
+    blob_url: str,
+    client: Optional[httpx.AsyncClient] = None
+) -> Optional[str]:
     """Download file from Vercel Blob and return temporary file path"""
     try:
-        import httpx
-        
         print(f"[BLOB] Downloading from {blob_url}...")
-        
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            response = await client.get(blob_url)
-            
-            if response.status_code == 200:
-                # Create temporary file
-                suffix = Path(blob_url).suffix or ".pdf"
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-                    tmp_file.write(response.content)
-                    tmp_path = tmp_file.name
-                
-                print(f"[BLOB] Downloaded to temporary file: {tmp_path}")
-                return tmp_path
-            else:
+
+        client = client or get_blob_client()
+        async with client.stream("GET", blob_url) as response:
+            if response.status_code != 200:
                 print(f"[BLOB] Download failed with status {response.status_code}")
                 return None
-                
+
+            # Create temporary file and stream the body into it chunk by chunk,
+            # so large PDFs are never fully held in memory or written on the loop
+            suffix = Path(blob_url).suffix or ".pdf"
+            fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+            os.close(fd)
+            try:
+                async with aiofiles.open(tmp_path, "wb") as tmp_file:
+                    async for chunk in response.aiter_bytes(TRANSFER_CHUNK_SIZE):
+                        await tmp_file.write(chunk)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+
+        print(f"[BLOB] Downloaded to temporary file: {tmp_path}")
+        return tmp_path
+
     except Exception as e:
         print(f"[BLOB] Download failed: {e}")
         import traceback
@@ -4,72 +4,419 @@ Replaces Claude + NVIDIA with single unified AI service
 """
 
 import asyncio
-import json
+import functools
+import hashlib
+import logging
+import re
 import time
-from typing import Dict, List, Any, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from string import Template
+from types import MappingProxyType
+from typing import AsyncIterator, Dict, List, Any, Literal, Mapping, Optional, Set, Union
 from google import genai
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 from ..core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Exact-match response cache shared by every GeminiService instance, keyed on
+# sha256(model|prompt). Identical prompts (same paper content, same request)
+# return without a network call or a rate-limit slot.
+RESPONSE_CACHE_SIZE = 256
+_response_cache: "OrderedDict[str, str]" = OrderedDict()
+
+# Cacheable calls currently waiting on Gemini, by cache key. A second caller
+# with the same prompt awaits the first one's result instead of paying for
+# an identical request (double-clicked Analyze, same paper uploaded twice).
+_inflight: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+
+
+def _cache_key(model: str, prompt: str, system_instruction: Optional[str] = None) -> str:
+    return hashlib.sha256(f"{model}|{system_instruction or ''}|{prompt}".encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _schema_adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def _is_cacheable(response_text: Optional[str], schema: Optional[Any]) -> bool:
+    """Only non-empty replies that parse against the requested schema are cached"""
+    if not response_text:
+        return False
+    if schema is None:
+        return True
+    try:
+        _schema_adapter(schema).validate_json(response_text)
+    except ValidationError:
+        return False
+    return True
+
+
+@dataclass(frozen=True)
+class PaperContext:
+    """
+    A paper's text plus the prefixes the prompts use, sliced once per paper
+    so the calls made while processing it share the same strings
+    """
+
+    full: str
+    head_3k: str
+    head_5k: str
+    head_8k: str
+
+    @classmethod
+    def from_content(cls, content: str) -> "PaperContext":
+        return cls(content, content[:3000], content[:5000], content[:8000])
+
+
+def _as_paper_context(content: Union[str, PaperContext]) -> PaperContext:
+    if isinstance(content, PaperContext):
+        return content
+    return PaperContext.from_content(content)
+
+
+class _ConceptSchema(BaseModel):
+    """Shape Gemini must return for each concept (structured output)"""
+
+    name: str
+    description: str
+    importance_score: float
+    concept_type: Literal[
+        "mathematical", "conceptual", "historical", "methodological", "technical", "empirical"
+    ]
+
+
+class _MetadataSchema(BaseModel):
+    """Shape Gemini must return for paper metadata (structured output)"""
+
+    title: str
+    authors: List[str]
+
+
+_CONCEPT_LIST = TypeAdapter(List[_ConceptSchema])
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_QUESTION_RE = re.compile(
+    r"\b(?:what|how|why|when|where|explain|describe|tell me|can you)\b", re.IGNORECASE
+)
+
+
+def _concept_key(name: str) -> str:
+    """Normalised concept name for duplicate checks: "Back-propagation" and
+    "backpropagation" map to the same key"""
+    return _NON_ALNUM.sub("", name.casefold())
+
+
+# Rules shared by every concept-extraction call. They go out as the system
+# instruction, and the JSON shape is enforced by the response schema, so the
+# per-call prompts only carry the paper text and the task.
+_CONCEPT_SYSTEM_INSTRUCTION = """You extract technical concepts from research papers and answer with a JSON array of concepts.
+
+Rules:
+- "name": a specific technical term taken from the paper, under 50 characters. No generic phrases or descriptors like "Key Concept from".
+- "description": a clear explanation in 1-2 sentences, under 200 characters, with no markdown formatting or special characters.
+- "importance_score": between 0.5 and 1.0.
+- "concept_type": the most fitting category from "mathematical", "conceptual", "historical", "methodological", "technical", "empirical".
+- Extract REAL technical concepts from the paper: the most important methods, algorithms, or innovations."""
+
+# Prompt templates are parsed once at import rather than re-formatted from
+# f-strings inside every call
+_ANALYZE_TMPL = Template(
+    """Extract exactly 3 key technical concepts from this research paper.
+
+Paper Title: ${title}
+Content: ${content}"""
+)
+
+_CONCEPTS_TMPL = Template(
+    """Extract exactly ${n} specific technical concepts from this research paper.
+
+Research text: ${content}"""
+)
+
+_ADDITIONAL_CONCEPTS_TMPL = Template(
+    """[Request #${timestamp}] Analyze this research paper and identify ${n} completely new technical concepts that haven't been identified yet.
+
+Research text: ${content}
+
+EXISTING CONCEPTS TO AVOID:
+${existing_list}
+
+Your task: Find ${n} genuinely different technical concepts that each:
+1. Are completely distinct from existing concepts listed above and from each other
+2. Represent a unique technical/methodological aspect of the research
+3. Use specific terminology directly from the paper
+4. Bring new insight not covered by existing concepts"""
+)
+
+_SUMMARY_TMPL = Template(
+    """Generate a clear, concise summary of this research paper. Write it as if you're explaining the paper to someone who wants to understand its main contributions.
+
+Paper Title: ${title}
+Paper Content: ${content}
+
+Write a summary that:
+- Explains the main research question or problem addressed
+- Describes the key methodology or approach
+- Highlights the most important findings or contributions
+- Is written in clear, accessible language
+- Is 3-5 sentences long
+- Does NOT include markdown formatting
+- Does NOT repeat the title
+
+Summary:"""
+)
+
+_METADATA_TMPL = Template(
+    """Extract the paper metadata from this research paper text. Be precise and accurate.
+
+Text: ${content}
+
+Please extract:
+1. TITLE: The exact title of the research paper (not repeated or with "by")
+2. AUTHORS: List of author names (first and last names)
+
+Return in JSON format:
+{
+    "title": "Exact Paper Title Here",
+    "authors": ["Author One", "Author Two", "Author Three"]
+}
+
+Rules:
+- Title should be the actual paper title, not repeated
+- Authors should be real names only, no affiliations
+- If any field is unclear, use empty string or empty array
+
+JSON:"""
+)
+
+
+class _TokenBucket:
+    """Async token bucket: refills `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+# Gemini quotas are per API key, so pacing is shared by every GeminiService
+_gemini_bucket = _TokenBucket(
+    rate=settings.GEMINI_RPM / 60, capacity=max(1, settings.GEMINI_BURST)
+)
+_gemini_semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+
+
+_NON_CLASS_CHARS = re.compile(r"[^A-Za-z0-9]+")
+
+# First markdown code block (```python, ``` or any other tag); an unclosed
+# fence runs to the end of the text
+_FENCE_RE = re.compile(r"```[^\n]*\n?(.*?)(?:```|\Z)", re.DOTALL)
+
+
+def _strip_code_fence(text: str) -> str:
+    """Return the contents of the first fenced code block, or text unchanged"""
+    match = _FENCE_RE.search(text)
+    return match.group(1) if match else text
+
+
+@functools.lru_cache(maxsize=512)
+def _safe_class_name(name: str, maxlen: int) -> str:
+    """
+    ASCII alphanumeric prefix of a concept name, for use in a Scene class
+    name; "ConceptScene" when that would be empty or start with a digit
+    """
+    safe_name = _NON_CLASS_CHARS.sub("", name)[:maxlen]
+    if not safe_name or safe_name[0].isdigit():
+        return "ConceptScene"
+    return safe_name
+
+
+# Scenes used when Gemini can't produce Manim code
+_FALLBACK_MANIM_TMPL = Template(
+    '''
+class ${safe_name}Scene(Scene):
+    def construct(self):
+        # Title - clean and simple
+        title = Text("${short_name}", font_size=36, color=WHITE)
+        title.to_edge(UP, buff=0.5)
+        self.play(Write(title), run_time=1)
+        self.wait(0.5)
+        
+        # Description - shorter for readability
+        desc = Text(
+            "${short_desc}",
+            font_size=20,
+            color=BLUE,
+            line_spacing=1.2
+        ).scale(0.8)
+        desc.next_to(title, DOWN, buff=0.8)
+        self.play(FadeIn(desc), run_time=1)
+        self.wait(1)
+        
+        # Simple mathematical visualization
+        equation = MathTex("f(x) = ax + b", font_size=48, color=YELLOW)
+        equation.next_to(desc, DOWN, buff=1)
+        self.play(Write(equation), run_time=1)
+        self.wait(1)
+        
+        # Quick clean exit
+        self.play(
+            FadeOut(title, desc, equation),
+            run_time=0.8
+        )
+        self.wait(0.2)
+'''
+)
+
+_FALLBACK_INTRO_TMPL = Template(
+    '''
+class IntroScene(Scene):
+    def construct(self):
+        # Title
+        title = Text("${concept_name}", font_size=48)
+        title.to_edge(UP)
+        self.play(Write(title))
+        self.wait(2)
+        
+        # Fade out
+        self.play(FadeOut(title))
+        self.wait(1)
+'''
+)
+
+# Terms _fallback_analysis looks for in a paper
+_FALLBACK_KEYWORDS_RE = re.compile(
+    r"neural network|deep learning|algorithm|model|training", re.IGNORECASE
+)
+
+# Varied generic concepts for when additional concept generation fails.
+# Read-only views, so every caller can share them without copying.
+_FALLBACK_CONCEPTS = (
+    MappingProxyType({
+        "name": "Research Implementation Details",
+        "description": "Specific implementation aspects and technical details of the research methodology",
+        "importance_score": 0.6,
+        "concept_type": "technical",
+    }),
+    MappingProxyType({
+        "name": "Experimental Design Framework",
+        "description": "The underlying framework and design principles used in the experimental approach",
+        "importance_score": 0.7,
+        "concept_type": "methodological",
+    }),
+    MappingProxyType({
+        "name": "Technical Analysis Method",
+        "description": "The analytical methodology and technical approach employed in this research",
+        "importance_score": 0.6,
+        "concept_type": "technical",
+    }),
+    MappingProxyType({
+        "name": "Data Processing Technique",
+        "description": "The specific data processing and analysis techniques utilized in the study",
+        "importance_score": 0.6,
+        "concept_type": "methodological",
+    }),
+    MappingProxyType({
+        "name": "Statistical Evaluation Approach",
+        "description": "The statistical methods and evaluation criteria used to assess the research results",
+        "importance_score": 0.6,
+        "concept_type": "mathematical",
+    }),
+    MappingProxyType({
+        "name": "Performance Optimization Strategy",
+        "description": "Techniques and strategies employed to optimize system or model performance",
+        "importance_score": 0.7,
+        "concept_type": "technical",
+    }),
+)
+
+
+def _is_rate_limit(e: BaseException) -> bool:
+    error_str = str(e).lower()
+    return (
+        "503" in error_str
+        or "429" in error_str
+        or "unavailable" in error_str
+        or "rate limit" in error_str
+        or "quota" in error_str
+        or "overloaded" in error_str
+    )
+
+
+def _log_gemini_retry(retry_state: RetryCallState) -> None:
+    e = retry_state.outcome.exception()
+    logger.warning(
+        "Gemini API %s (attempt %d). Waiting %.1fs before retry...",
+        "rate limited" if _is_rate_limit(e) else f"call failed: {e}",
+        retry_state.attempt_number,
+        retry_state.next_action.sleep,
+    )
+
 
 class GeminiService:
     def __init__(self):
         self.api_key = settings.GEMINI_API_KEY
         self.model = settings.GEMINI_MODEL
         self.client = None
-        self.last_call_time = 0  # Track last API call time for rate limiting
-        self.min_call_interval = 0.5  # Minimum seconds between API calls
+        self.aio = None
 
         if self.api_key:
             # Initialize Gemini client
             self.client = genai.Client(api_key=self.api_key)
+            self.aio = self.client.aio
         else:
-            print("Warning: GEMINI_API_KEY not set. Using fallback service.")
+            logger.warning("GEMINI_API_KEY not set. Using fallback service.")
 
     async def analyze_paper_with_gemini(
-        self, content: str, title: str = ""
+        self, content: Union[str, PaperContext], title: str = ""
     ) -> Dict[str, Any]:
         """
         Use Gemini 2.5 Flash for comprehensive paper analysis
         """
+        paper = _as_paper_context(content)
+        content = paper.full
         if not self.client:
-            print("No Gemini client available, using fallback analysis")
+            logger.debug("No Gemini client available, using fallback analysis")
             return await self._fallback_analysis(content, title)
 
         try:
-            prompt = f"""Extract key concepts from this research paper in JSON format.
-
-Paper Title: {title}
-Content: {content[:5000]}
-
-Return exactly 3 technical concepts in this JSON format:
-[
-  {{
-    "name": "Specific Technical Term",
-    "description": "Clear explanation in 1-2 sentences",
-    "importance_score": 0.8,
-    "concept_type": "mathematical"
-  }}
-]
+            prompt = _ANALYZE_TMPL.substitute(title=title, content=paper.head_5k)
 
-Rules:
-- For "concept_type", choose the most fitting category from: "mathematical", "conceptual", "historical", "methodological", "technical", "empirical".
-- Extract REAL technical concepts from the paper
-- Use specific names from the paper, not generic phrases
-- Keep names under 50 characters
-- Keep descriptions under 200 characters
-- Return ONLY 3 concepts for initial analysis
-
-JSON array:"""
-
-            response = await self._call_gemini_api(prompt)
+            response = await self._call_gemini_api(
+                prompt,
+                schema=List[_ConceptSchema],
+                system_instruction=_CONCEPT_SYSTEM_INSTRUCTION,
+            )
 
             if response:
-                print(f"Gemini API response received: {len(response)} chars")
-                # Try to parse as JSON first
+                logger.debug("Gemini API response received: %d chars", len(response))
                 concepts = self._parse_gemini_concepts(response)
 
                 if concepts:
-                    print(f"Successfully parsed {len(concepts)} concepts")
+                    logger.debug("Successfully parsed %d concepts", len(concepts))
                     insights = ["Analysis completed with AI insights"]
                     return {
                         "concepts": concepts,
@@ -78,54 +425,41 @@ JSON array:"""
                         "full_analysis": response,
                     }
                 else:
-                    print("Failed to parse concepts from Gemini response")
+                    logger.warning("Failed to parse concepts from Gemini response")
                     return await self._fallback_analysis(content, title)
             else:
-                print("No response from Gemini API")
+                logger.warning("No response from Gemini API")
                 return await self._fallback_analysis(content, title)
 
         except Exception as e:
-            print(f"Error in Gemini analysis: {e}")
+            logger.error("Error in Gemini analysis: %s", e)
             return await self._fallback_analysis(content, title)
 
-    async def generate_concepts_with_gemini(self, content: str) -> List[Dict[str, Any]]:
+    async def generate_concepts_with_gemini(
+        self, content: Union[str, PaperContext], n: int = 3, use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
         """
-        Use Gemini 2.5 for high-quality concept extraction with structured output
+        Use Gemini 2.5 for high-quality concept extraction with structured output.
+        All n concepts come back from one call so the paper text is sent once.
+        Pass use_cache=False to ask Gemini again instead of reusing an earlier reply.
         """
+        paper = _as_paper_context(content)
+        content = paper.full
         if not self.client:
             return await self._fallback_concept_extraction(content)
 
         try:
-            prompt = f"""Extract exactly 3 specific technical concepts from this research paper. Focus on the most important methods, algorithms, or innovations.
-
-Research text: {content[:5000]}
-
-Return a JSON array with exactly 3 concepts in this format:
-[
-  {{
-    "name": "Specific Technical Term",
-    "description": "Clear explanation in 1-2 sentences without markdown formatting",
-    "importance_score": 0.8,
-    "concept_type": "technical"
-  }}
-]
-
-Rules:
-- For "concept_type", choose the most fitting category from: "mathematical", "conceptual", "historical", "methodological", "technical", "empirical".
-- Extract ONLY the most important technical concepts
-- Use specific names from the paper, not generic phrases
-- No markdown formatting or special characters in descriptions
-- Keep names under 50 characters
-- Keep descriptions under 200 characters
-- No phrases like "Key Concept from" or generic descriptors
+            prompt = _CONCEPTS_TMPL.substitute(content=paper.head_5k, n=n)
 
-JSON array:"""
-
-            response = await self._call_gemini_api(prompt)
+            response = await self._call_gemini_api(
+                prompt,
+                use_cache=use_cache,
+                schema=List[_ConceptSchema],
+                system_instruction=_CONCEPT_SYSTEM_INSTRUCTION,
+            )
 
             if response:
-                # Try to parse as JSON first, fallback to text parsing
-                concepts = self._parse_gemini_concepts(response)
+                concepts = self._parse_gemini_concepts(response, limit=n)
                 return (
                     concepts
                     if concepts
@@ -135,162 +469,131 @@ JSON array:"""
                 return await self._fallback_concept_extraction(content)
 
         except Exception as e:
-            print(f"Error in Gemini concept extraction: {e}")
+            logger.error("Error in Gemini concept extraction: %s", e)
             return await self._fallback_concept_extraction(content)
 
     async def generate_additional_concept_with_gemini(
-        self, content: str, existing_concepts: List[str]
-    ) -> Optional[Dict[str, Any]]:
+        self, content: Union[str, PaperContext], existing_concepts: List[str]
+    ) -> Optional[Mapping[str, Any]]:
         """
         Generate ONE truly fresh additional concept - no caching, always new
         """
+        concepts = await self.generate_additional_concepts_with_gemini(
+            content, existing_concepts, n=1
+        )
+        if concepts:
+            return concepts[0]
+        return await self._fallback_additional_concept()
+
+    async def generate_additional_concepts_with_gemini(
+        self, content: Union[str, PaperContext], existing_concepts: List[str], n: int = 3
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate up to n fresh concepts in one call, so the paper text is sent
+        once per batch instead of once per concept. Returns only the concepts
+        that pass validation (possibly none).
+        """
         if not self.client:
-            return await self._fallback_additional_concept()
+            return []
 
         try:
             # Add randomness to ensure fresh concepts each time
-            import time
-
             timestamp = int(time.time())
 
             existing_list = (
-                "\n".join([f"- {concept}" for concept in existing_concepts])
+                "- " + "\n- ".join(existing_concepts)
                 if existing_concepts
                 else "- None yet"
             )
 
-            prompt = f"""[Request #{timestamp}] Analyze this research paper and identify ONE completely new technical concept that hasn't been identified yet.
+            prompt = _ADDITIONAL_CONCEPTS_TMPL.substitute(
+                content=_as_paper_context(content).head_5k, timestamp=timestamp, existing_list=existing_list, n=n
+            )
 
-Research text: {content[:5000]}
+            # Each request asks for new concepts; never serve it from cache
+            response = await self._call_gemini_api(
+                prompt,
+                use_cache=False,
+                schema=List[_ConceptSchema],
+                system_instruction=_CONCEPT_SYSTEM_INSTRUCTION,
+            )
 
-EXISTING CONCEPTS TO AVOID:
-{existing_list}
-
-Your task: Find ONE genuinely different technical concept that:
-1. Is completely distinct from existing concepts listed above
-2. Represents a unique technical/methodological aspect of the research
-3. Uses specific terminology directly from the paper
-4. Brings new insight not covered by existing concepts
-
-Generate a fresh, unique concept in JSON format:
-{{
-    "name": "Specific Technical Term From Paper",
-    "description": "Clear explanation in 1-2 sentences focusing on what makes this concept unique",
-    "importance_score": 0.7,
-    "concept_type": "methodological"
-}}
+            if not response:
+                return []
 
-Requirements:
-- For "concept_type", choose the most fitting category from: "mathematical", "conceptual", "historical", "methodological", "technical", "empirical".
-- Must be genuinely different from existing concepts
-- Extract real technical terms from the paper, not generic descriptions
-- Each generation should find different aspects of the research
-- Keep name under 50 characters, description under 200 characters
-- No markdown formatting
+            logger.debug("Gemini response for additional concepts: %.200s...", response)
+            try:
+                concepts_data = _CONCEPT_LIST.validate_json(response)
+            except ValidationError as e:
+                logger.warning("Response did not match the concept schema: %s", e)
+                return []
+
+            concepts = []
+            taken = {_concept_key(existing) for existing in existing_concepts}
+            for concept_data in concepts_data[:n]:
+                concept = self._validate_additional_concept(concept_data.model_dump(), taken)
+                if concept:
+                    concepts.append(concept)
+                    taken.add(_concept_key(concept["name"]))
+            return concepts
 
-JSON object:"""
+        except Exception as e:
+            logger.error("Error generating additional concepts: %s", e)
+            return []
 
-            response = await self._call_gemini_api(prompt)
+    def _validate_additional_concept(
+        self, concept_data: Any, existing_keys: Set[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Normalise one generated concept, or None if it is unusable.
+        existing_keys holds _concept_key() of every concept already taken.
+        """
+        if not isinstance(concept_data, dict):
+            return None
 
-            if response:
-                print(f"Gemini response for additional concept: {response[:200]}...")
-                try:
-                    # Try multiple JSON extraction strategies
-                    json_str = None
-                    
-                    # Strategy 1: Look for JSON object with double braces
-                    if "{{" in response and "}}" in response:
-                        start = response.find("{{")
-                        end = response.rfind("}}") + 1
-                        json_str = response[start:end]
-                    # Strategy 2: Look for JSON object with single braces
-                    elif "{" in response and "}" in response:
-                        start = response.find("{")
-                        end = response.rfind("}") + 1
-                        json_str = response[start:end]
-                    # Strategy 3: Try to find JSON in code blocks
-                    elif "```json" in response:
-                        start = response.find("```json") + 7
-                        end = response.find("```", start)
-                        if end > start:
-                            json_str = response[start:end].strip()
-                    elif "```" in response:
-                        start = response.find("```") + 3
-                        end = response.find("```", start)
-                        if end > start:
-                            json_str = response[start:end].strip()
-                    
-                    if json_str:
-                        print(f"Extracted JSON string: {json_str[:100]}...")
-                        concept_data = json.loads(json_str)
-
-                        # Validate the concept
-                        name = concept_data.get("name", "").strip()
-                        description = concept_data.get("description", "").strip()
-
-                        if not name or not description:
-                            print(f"Missing name or description. Name: '{name}', Description: '{description[:50]}...'")
-                            return await self._fallback_additional_concept(timestamp)
-                        
-                        if len(name) <= 3:
-                            print(f"Name too short: '{name}'")
-                            return await self._fallback_additional_concept(timestamp)
-                        
-                        if len(description) <= 10:
-                            print(f"Description too short: '{description}'")
-                            return await self._fallback_additional_concept(timestamp)
-
-                        # More lenient duplicate checking - allow variations
-                        name_lower = name.lower()
-                        is_too_similar = any(
-                            existing.lower() == name_lower
-                            or (
-                                len(existing) > 5
-                                and existing.lower() in name_lower
-                                and len(name_lower) - len(existing.lower()) < 3
-                            )
-                            for existing in existing_concepts
-                        )
+        try:
+            name = str(concept_data.get("name", "")).strip()
+            description = str(concept_data.get("description", "")).strip()
 
-                        if is_too_similar:
-                            print(f"Concept too similar to existing: '{name}' (existing: {existing_concepts})")
-                            return await self._fallback_additional_concept(timestamp)
-
-                        print(f"Successfully parsed and validated concept: '{name}'")
-                        return {
-                            "name": name[:80],
-                            "description": description[:400],
-                            "importance_score": min(
-                                1.0,
-                                max(
-                                    0.5,
-                                    float(
-                                        concept_data.get(
-                                            "importance_score", 0.7
-                                        )
-                                    ),
-                                ),
-                            ),
-                            "concept_type": concept_data.get(
-                                "concept_type", "conceptual"
-                            ),
-                        }
-                    else:
-                        print(f"Could not extract JSON from response. Response: {response[:300]}")
-
-                except (json.JSONDecodeError, KeyError, ValueError) as e:
-                    print(f"JSON parsing failed for additional concept: {e}")
-                    print(f"Response that failed to parse: {response[:300]}")
-
-                # Use fallback with timestamp for uniqueness
-                print("Falling back to generic concept due to parsing/validation failure")
-                return await self._fallback_additional_concept(timestamp)
-            else:
-                return await self._fallback_additional_concept(timestamp)
+            if not name or not description:
+                logger.debug("Missing name or description. Name: '%s', Description: '%.50s...'", name, description)
+                return None
+            
+            if len(name) <= 3:
+                logger.debug("Name too short: '%s'", name)
+                return None
+            
+            if len(description) <= 10:
+                logger.debug("Description too short: '%s'", description)
+                return None
+
+            # Exact match on the normalised name is a set lookup; the substring
+            # check still catches small variations like a trailing "s"
+            key = _concept_key(name)
+            is_too_similar = key in existing_keys or any(
+                len(existing) > 5
+                and existing in key
+                and len(key) - len(existing) < 3
+                for existing in existing_keys
+            )
 
-        except Exception as e:
-            print(f"Error generating additional concept: {e}")
-            return await self._fallback_additional_concept()
+            if is_too_similar:
+                logger.debug("Concept too similar to existing: '%s'", name)
+                return None
+
+            logger.debug("Successfully parsed and validated concept: '%s'", name)
+            return {
+                "name": name[:80],
+                "description": description[:400],
+                "importance_score": min(
+                    1.0, max(0.5, float(concept_data.get("importance_score", 0.7)))
+                ),
+                "concept_type": concept_data.get("concept_type", "conceptual"),
+            }
+
+        except (ValueError, TypeError) as e:
+            logger.warning("Invalid additional concept %s: %s", concept_data, e)
+            return None
 
     async def generate_manim_code_with_gemini(
         self, concept_name: str, concept_description: str, paper_title: str = ""
@@ -299,16 +602,12 @@ JSON object:"""
         Generate high-quality Manim code using Gemini 2.5
         """
         if not self.client:
-            print("No Gemini client available, using fallback Manim code")
+            logger.debug("No Gemini client available, using fallback Manim code")
             return self._generate_fallback_manim_code(concept_name, concept_description)
 
         try:
             # Create a safe class name
-            safe_name = "".join(
-                c for c in concept_name.replace(" ", "").replace("-", "") if c.isalnum()
-            )[:15]
-            if not safe_name or safe_name[0].isdigit():
-                safe_name = "ConceptScene"
+            safe_name = _safe_class_name(concept_name, 15)
 
             prompt = f"""Generate Manim Python code for an educational animation in the style of 3blue1brown.
 
@@ -351,21 +650,21 @@ class {safe_name}Scene(Scene):
                 # Clean and validate the Manim code
                 manim_code = self._clean_manim_code(response, concept_name)
                 if "class " in manim_code and "Scene" in manim_code:
-                    print(f"Generated Manim code for: {concept_name}")
+                    logger.debug("Generated Manim code for: %s", concept_name)
                     return manim_code
                 else:
-                    print("Invalid Manim code generated, using fallback")
+                    logger.warning("Invalid Manim code generated, using fallback")
                     return self._generate_fallback_manim_code(
                         concept_name, concept_description
                     )
             else:
-                print("No response from Gemini, using fallback")
+                logger.warning("No response from Gemini, using fallback")
                 return self._generate_fallback_manim_code(
                     concept_name, concept_description
                 )
 
         except Exception as e:
-            print(f"Error generating Manim code: {e}")
+            logger.error("Error generating Manim code: %s", e)
             return self._generate_fallback_manim_code(concept_name, concept_description)
 
     async def generate_intro_manim_code(
@@ -417,7 +716,7 @@ Return ONLY the Python class code:
                 return self._generate_fallback_intro_manim(concept_name)
 
         except Exception as e:
-            print(f"Error generating intro Manim code: {e}")
+            logger.error("Error generating intro Manim code: %s", e)
             return self._generate_fallback_intro_manim(concept_name)
 
     async def clarify_text_with_gemini(self, text: str, context: str = "") -> str:
@@ -428,13 +727,44 @@ Return ONLY the Python class code:
             return "Clarification service temporarily unavailable."
 
         try:
-            # Determine if it's a question or text to clarify
-            is_question = text.strip().endswith("?") or any(
-                word in text.lower() for word in ["what", "how", "why", "when", "where", "explain", "describe", "tell me", "can you"]
+            response = await self._call_gemini_api(self._clarify_prompt(text, context))
+            return (
+                response.strip()
+                if response
+                else "Unable to provide clarification at this time."
             )
-            
-            if is_question:
-                prompt = f"""You are a helpful assistant answering questions about a research paper. Use the context provided to give accurate, conversational answers.
+
+        except Exception as e:
+            logger.error("Error in Gemini clarification: %s", e)
+            return "Unable to provide clarification at this time."
+
+    async def stream_clarify_text_with_gemini(
+        self, text: str, context: str = ""
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of clarify_text_with_gemini: yields the answer as
+        Gemini produces it, so the first words arrive before decoding finishes
+        """
+        if not self.client:
+            yield "Clarification service temporarily unavailable."
+            return
+
+        produced = False
+        try:
+            async for chunk in self._stream_gemini_api(self._clarify_prompt(text, context)):
+                produced = True
+                yield chunk
+        except Exception as e:
+            logger.error("Error in streaming Gemini clarification: %s", e)
+        if not produced:
+            yield "Unable to provide clarification at this time."
+
+    def _clarify_prompt(self, text: str, context: str) -> str:
+        # Determine if it's a question or text to clarify
+        is_question = text.strip().endswith("?") or bool(_QUESTION_RE.search(text))
+
+        if is_question:
+            return f"""You are a helpful assistant answering questions about a research paper. Use the context provided to give accurate, conversational answers.
 
 Context about the paper:
 {context}
@@ -442,26 +772,16 @@ Context about the paper:
 User's question: "{text}"
 
 Provide a helpful, conversational answer based on the paper content. If the answer isn't in the provided context, say so. Keep responses concise (2-4 sentences) but natural. No markdown formatting, just plain text. Reference previous conversation if relevant."""
-            else:
-                prompt = f"""Explain this research text in simple terms. Be concise and avoid markdown formatting.
+        return f"""Explain this research text in simple terms. Be concise and avoid markdown formatting.
 
 Text: "{text}"
 Context: {context}
 
 Provide a clear, direct explanation in 2-3 sentences. No bullet points, no markdown formatting, just plain text explanation."""
 
-            response = await self._call_gemini_api(prompt)
-            return (
-                response.strip()
-                if response
-                else "Unable to provide clarification at this time."
-            )
-
-        except Exception as e:
-            print(f"Error in Gemini clarification: {e}")
-            return "Unable to provide clarification at this time."
-
-    async def generate_paper_summary(self, content: str, title: str = "") -> str:
+    async def generate_paper_summary(
+        self, content: Union[str, PaperContext], title: str = ""
+    ) -> str:
         """
         Generate a concise summary of the research paper using Gemini
         """
@@ -470,23 +790,9 @@ Provide a clear, direct explanation in 2-3 sentences. No bullet points, no markd
 
         try:
             # Use more content for better summary (up to 8000 chars)
-            content_preview = content[:8000]
-            
-            prompt = f"""Generate a clear, concise summary of this research paper. Write it as if you're explaining the paper to someone who wants to understand its main contributions.
-
-Paper Title: {title}
-Paper Content: {content_preview}
-
-Write a summary that:
-- Explains the main research question or problem addressed
-- Describes the key methodology or approach
-- Highlights the most important findings or contributions
-- Is written in clear, accessible language
-- Is 3-5 sentences long
-- Does NOT include markdown formatting
-- Does NOT repeat the title
-
-Summary:"""
+            prompt = _SUMMARY_TMPL.substitute(
+                title=title, content=_as_paper_context(content).head_8k
+            )
 
             response = await self._call_gemini_api(prompt)
             return (
@@ -496,10 +802,12 @@ Summary:"""
             )
 
         except Exception as e:
-            print(f"Error generating paper summary: {e}")
+            logger.error("Error generating paper summary: %s", e)
             return "Unable to generate summary at this time."
 
-    async def extract_paper_metadata_with_gemini(self, content: str) -> Dict[str, Any]:
+    async def extract_paper_metadata_with_gemini(
+        self, content: Union[str, PaperContext]
+    ) -> Dict[str, Any]:
         """
         Use Gemini to intelligently extract paper title, authors, and generate summary
         """
@@ -507,149 +815,143 @@ Summary:"""
             return {"title": "", "authors": [], "abstract": ""}
 
         try:
-            prompt = f"""Extract the paper metadata from this research paper text. Be precise and accurate.
-
-Text: {content[:3000]}
-
-Please extract:
-1. TITLE: The exact title of the research paper (not repeated or with "by")
-2. AUTHORS: List of author names (first and last names)
-
-Return in JSON format:
-{{
-    "title": "Exact Paper Title Here",
-    "authors": ["Author One", "Author Two", "Author Three"]
-}}
-
-Rules:
-- Title should be the actual paper title, not repeated
-- Authors should be real names only, no affiliations
-- If any field is unclear, use empty string or empty array
-
-JSON:"""
-
-            response = await self._call_gemini_api(prompt)
+            paper = _as_paper_context(content)
+            prompt = _METADATA_TMPL.substitute(content=paper.head_3k)
+
+            # The summary doesn't depend on the extracted title, so both calls
+            # go out together instead of back to back
+            response, summary = await asyncio.gather(
+                self._call_gemini_api(prompt, schema=_MetadataSchema),
+                self.generate_paper_summary(paper),
+            )
 
             if response:
                 try:
-                    # Try to parse JSON response
-                    if "{{" in response and "}}" in response:
-                        start = response.find("{{")
-                        end = response.rfind("}}") + 1
-                        json_str = response[start:end]
-                        metadata = json.loads(json_str)
-
-                        title = metadata.get("title", "")[:200]
-                        authors = metadata.get("authors", [])[:5]  # Limit to 5 authors
-                        
-                        # Generate summary separately with more content
-                        summary = await self.generate_paper_summary(content, title)
-
-                        return {
-                            "title": title,
-                            "authors": authors,
-                            "abstract": summary,  # Store summary as "abstract" for compatibility
-                        }
-                except (json.JSONDecodeError, KeyError) as e:
-                    print(f"JSON parsing failed for metadata: {e}")
-
-                # Fallback to text parsing if JSON fails
-                parsed = self._parse_metadata_from_text(response)
-                # Generate summary even if JSON parsing failed
-                if parsed.get("title"):
-                    summary = await self.generate_paper_summary(content, parsed.get("title", ""))
-                    parsed["abstract"] = summary
-                return parsed
+                    metadata = _MetadataSchema.model_validate_json(response)
+                except ValidationError as e:
+                    logger.warning("Response did not match the metadata schema: %s", e)
+                    return {"title": "", "authors": [], "abstract": ""}
+
+                return {
+                    "title": metadata.title[:200],
+                    "authors": metadata.authors[:5],  # Limit to 5 authors
+                    "abstract": summary,  # Store summary as "abstract" for compatibility
+                }
 
             return {"title": "", "authors": [], "abstract": ""}
 
         except Exception as e:
-            print(f"Error in Gemini metadata extraction: {e}")
+            logger.error("Error in Gemini metadata extraction: %s", e)
             return {"title": "", "authors": [], "abstract": ""}
 
-    def _parse_metadata_from_text(self, text: str) -> Dict[str, Any]:
+    async def _call_gemini_api(
+        self,
+        prompt: str,
+        max_retries: int = 3,
+        use_cache: bool = True,
+        schema: Optional[Any] = None,
+        system_instruction: Optional[str] = None,
+    ) -> Optional[str]:
         """
-        Fallback method to parse metadata from Gemini text response
+        Make async call to Gemini API with retries and jittered exponential backoff.
+        Successful responses (that parse against the schema, if one is given)
+        are cached by exact prompt; pass use_cache=False for prompts that must
+        always produce a fresh answer. With a schema
+        (a pydantic model or list of one) Gemini returns JSON matching it;
+        system_instruction carries rules shared across calls.
         """
-        metadata = {"title": "", "authors": [], "abstract": ""}
-
-        lines = text.split("\n")
-        current_field = None
-
-        for line in lines:
-            line = line.strip()
-            if line.lower().startswith("title:"):
-                metadata["title"] = line[6:].strip().strip('"')
-            elif line.lower().startswith("authors:"):
-                authors_text = line[8:].strip()
-                if authors_text:
-                    # Try to parse author list
-                    authors = [a.strip().strip('"') for a in authors_text.split(",")]
-                    metadata["authors"] = authors[:5]
-            # Note: abstract/summary is now generated separately, not parsed
-
-        return metadata
-
-    async def _call_gemini_api(self, prompt: str, max_retries: int = 3) -> Optional[str]:
-        """
-        Make async call to Gemini API with retry logic and exponential backoff
-        """
-        # Rate limiting: ensure minimum time between calls
-        current_time = time.time()
-        time_since_last_call = current_time - self.last_call_time
-        if time_since_last_call < self.min_call_interval:
-            await asyncio.sleep(self.min_call_interval - time_since_last_call)
-        
-        for attempt in range(max_retries):
-            try:
-                # Using the new google-genai client
-                response = await asyncio.to_thread(
-                    self.client.models.generate_content, model=self.model, contents=prompt
-                )
+        key = _cache_key(self.model, prompt, system_instruction) if use_cache else None
+        if key is not None:
+            cached = _response_cache.get(key)
+            if cached is not None:
+                _response_cache.move_to_end(key)
+                return cached
+
+            pending = _inflight.get(key)
+            if pending is not None:
+                # shield: cancelling this caller must not cancel the leader's result
+                return await asyncio.shield(pending)
+            pending = asyncio.get_running_loop().create_future()
+            _inflight[key] = pending
+
+        response_text = None
+        try:
+            response_text = await self._call_gemini_api_uncached(
+                prompt, max_retries, schema, system_instruction
+            )
 
-                self.last_call_time = time.time()  # Update last call time on success
+            # A truncated or malformed reply would otherwise be replayed on
+            # every retry until it was evicted
+            if key is not None and _is_cacheable(response_text, schema):
+                _response_cache[key] = response_text
+                if len(_response_cache) > RESPONSE_CACHE_SIZE:
+                    _response_cache.popitem(last=False)
+            return response_text
+        finally:
+            if key is not None:
+                # Waiters get None (the usual failure value) if this call
+                # raised or was cancelled
+                _inflight.pop(key, None)
+                if not pending.done():
+                    pending.set_result(response_text)
+
+    async def _call_gemini_api_uncached(
+        self,
+        prompt: str,
+        max_retries: int,
+        schema: Optional[Any] = None,
+        system_instruction: Optional[str] = None,
+    ) -> Optional[str]:
+        config = {}
+        if schema is not None:
+            config["response_mime_type"] = "application/json"
+            config["response_schema"] = schema
+        if system_instruction:
+            config["system_instruction"] = system_instruction
+
+        # Full jitter spreads retries of calls that failed together (e.g. a
+        # gather of several prompts hitting a 429) across the backoff window
+        # instead of sending them all again at the same instant
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(max_retries),
+            wait=wait_random_exponential(multiplier=1, max=30),
+            before_sleep=_log_gemini_retry,
+            reraise=True,
+        )
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    # Rate limiting: bounded concurrency plus RPM token bucket, so
+                    # concurrent calls run in parallel up to the quota
+                    async with _gemini_semaphore:
+                        await _gemini_bucket.acquire()
+                        # Native async client: no worker-thread hop per call
+                        response = await self.aio.models.generate_content(
+                            model=self.model, contents=prompt, config=config or None
+                        )
+        except Exception as e:
+            logger.warning("Gemini API call failed: %s", e)
+            return None
 
-                if response and response.text:
-                    print(f"Gemini API call successful: {len(response.text)} chars")
-                    return response.text
-                else:
-                    print("Gemini API returned empty response")
-                    return None
-
-            except Exception as e:
-                error_str = str(e).lower()
-                is_rate_limit = (
-                    "503" in str(e) 
-                    or "unavailable" in error_str
-                    or "rate limit" in error_str
-                    or "quota" in error_str
-                    or "overloaded" in error_str
-                )
-                
-                if is_rate_limit and attempt < max_retries - 1:
-                    # Exponential backoff: 1s, 2s, 4s, etc.
-                    wait_time = 2 ** attempt
-                    print(f"Gemini API rate limited (attempt {attempt + 1}/{max_retries}). Waiting {wait_time}s before retry...")
-                    await asyncio.sleep(wait_time)
-                    continue
-                else:
-                    print(f"Gemini API call failed: {e}")
-                    if attempt < max_retries - 1:
-                        # For other errors, use shorter backoff
-                        wait_time = 1 * (attempt + 1)
-                        print(f"Retrying in {wait_time}s...")
-                        await asyncio.sleep(wait_time)
-                    else:
-                        return None
-        
+        if response and response.text:
+            logger.debug("Gemini API call successful: %d chars", len(response.text))
+            return response.text
+        logger.warning("Gemini API returned empty response")
         return None
 
-    def _extract_concepts_from_gemini_response(
-        self, gemini_text: str, title: str
-    ) -> List[Dict[str, Any]]:
-        """Extract structured concepts from Gemini analysis response"""
-        # Return empty list - we only want concepts from the JSON response now
-        return []
+    async def _stream_gemini_api(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Stream a Gemini response chunk by chunk. No retries or caching: once
+        text has been yielded a retry can't be hidden from the caller.
+        """
+        async with _gemini_semaphore:
+            await _gemini_bucket.acquire()
+            stream = await self.aio.models.generate_content_stream(
+                model=self.model, contents=prompt
+            )
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
 
     def _extract_insights_from_gemini_response(self, gemini_text: str) -> List[str]:
         """Extract key insights from Gemini analysis"""
@@ -691,57 +993,31 @@ JSON:"""
 
         return insights[:5]
 
-    def _parse_gemini_concepts(self, gemini_text: str) -> List[Dict[str, Any]]:
-        """Parse Gemini's concept response, try JSON first, fallback to text parsing"""
+    def _parse_gemini_concepts(
+        self, gemini_text: str, limit: int = 3
+    ) -> List[Dict[str, Any]]:
+        """Validate Gemini's structured concept response and normalise it"""
         try:
-            # Try to parse as JSON
-            if "[" in gemini_text and "]" in gemini_text:
-                start = gemini_text.find("[")
-                end = gemini_text.rfind("]") + 1
-                json_str = gemini_text[start:end]
-                concepts_data = json.loads(json_str)
-
-                concepts = []
-                for concept in concepts_data[
-                    :3
-                ]:  # Limit to 3 concepts for initial analysis
-                    if isinstance(concept, dict) and "name" in concept:
-                        concepts.append(
-                            {
-                                "name": concept.get("name", "")[:80],
-                                "description": concept.get("description", "")[:400],
-                                "importance_score": min(
-                                    1.0,
-                                    max(
-                                        0.5, float(concept.get("importance_score", 0.8))
-                                    ),
-                                ),
-                                "concept_type": concept.get(
-                                    "concept_type", "conceptual"
-                                ),
-                            }
-                        )
-
-                if concepts:
-                    return concepts
-
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
-            print(f"JSON parsing failed, using text parsing: {e}")
+            concepts_data = _CONCEPT_LIST.validate_json(gemini_text)
+        except ValidationError as e:
+            logger.warning("Response did not match the concept schema: %s", e)
+            return []
 
-        # Fallback to text parsing similar to Claude method
-        return self._extract_concepts_from_gemini_response(gemini_text, "")
+        return [
+            {
+                "name": concept.name[:80],
+                "description": concept.description[:400],
+                "importance_score": min(1.0, max(0.5, concept.importance_score)),
+                "concept_type": concept.concept_type,
+            }
+            for concept in concepts_data[:limit]
+            if concept.name
+        ]
 
     def _clean_manim_code(self, code_text: str, concept_name: str) -> str:
         """Clean and ensure valid Manim code"""
         # Remove markdown formatting
-        code_text = code_text.replace("```python", "").replace("```", "")
-
-        # Ensure we have a valid class name
-        safe_name = "".join(c for c in concept_name.replace(" ", "") if c.isalnum())[
-            :20
-        ]
-        if not safe_name or safe_name[0].isdigit():
-            safe_name = "Concept" + safe_name if safe_name else "ConceptScene"
+        code_text = _strip_code_fence(code_text)
 
         # If no valid class found, create a simple one
         if "class " not in code_text or "Scene" not in code_text:
@@ -751,15 +1027,15 @@ JSON:"""
 
         return code_text
 
+    # The fallback scenes are pure functions of their arguments, so retries and
+    # re-runs of the same concept reuse the rendered source
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
     def _generate_fallback_manim_code(
-        self, concept_name: str, concept_description: str
+        concept_name: str, concept_description: str
     ) -> str:
         """Generate optimized, simple Manim code for fast, reliable rendering"""
-        safe_name = "".join(c for c in concept_name.replace(" ", "") if c.isalnum())[
-            :15
-        ]
-        if not safe_name or safe_name[0].isdigit():
-            safe_name = "ConceptScene"
+        safe_name = _safe_class_name(concept_name, 15)
 
         # Keep concept name and description short for better rendering
         short_name = concept_name[:40] if len(concept_name) > 40 else concept_name
@@ -769,55 +1045,15 @@ JSON:"""
             else concept_description
         )
 
-        return f'''
-class {safe_name}Scene(Scene):
-    def construct(self):
-        # Title - clean and simple
-        title = Text("{short_name}", font_size=36, color=WHITE)
-        title.to_edge(UP, buff=0.5)
-        self.play(Write(title), run_time=1)
-        self.wait(0.5)
-        
-        # Description - shorter for readability
-        desc = Text(
-            "{short_desc}",
-            font_size=20,
-            color=BLUE,
-            line_spacing=1.2
-        ).scale(0.8)
-        desc.next_to(title, DOWN, buff=0.8)
-        self.play(FadeIn(desc), run_time=1)
-        self.wait(1)
-        
-        # Simple mathematical visualization
-        equation = MathTex("f(x) = ax + b", font_size=48, color=YELLOW)
-        equation.next_to(desc, DOWN, buff=1)
-        self.play(Write(equation), run_time=1)
-        self.wait(1)
-        
-        # Quick clean exit
-        self.play(
-            FadeOut(title, desc, equation),
-            run_time=0.8
+        return _FALLBACK_MANIM_TMPL.substitute(
+            safe_name=safe_name, short_name=short_name, short_desc=short_desc
         )
-        self.wait(0.2)
-'''
 
-    def _generate_fallback_intro_manim(self, concept_name: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _generate_fallback_intro_manim(concept_name: str) -> str:
         """Generate fallback intro Manim code"""
-        return f'''
-class IntroScene(Scene):
-    def construct(self):
-        # Title
-        title = Text("{concept_name[:50]}", font_size=48)
-        title.to_edge(UP)
-        self.play(Write(title))
-        self.wait(2)
-        
-        # Fade out
-        self.play(FadeOut(title))
-        self.wait(1)
-'''
+        return _FALLBACK_INTRO_TMPL.substitute(concept_name=concept_name[:50])
 
     async def generate_python_implementation(
         self, concept_name: str, concept_description: str
@@ -848,28 +1084,26 @@ Your task is to write a **single, concise** Python script that demonstrates the
 
             if response:
                 # Clean the response to ensure it's just the code
-                if "```python" in response:
-                    response = response.split("```python")[1].split("```")[0]
-                elif "```" in response:
-                    response = response.split("```")[1].split("```")[0]
-                return response.strip()
+                return _strip_code_fence(response).strip()
             else:
                 return "# Unable to generate code at this time."
 
         except Exception as e:
-            print(f"Error in Python code generation: {e}")
+            logger.error("Error in Python code generation: %s", e)
             return f"# An error occurred: {e}"
 
     async def _fallback_analysis(self, content: str, title: str) -> Dict[str, Any]:
         """Fallback analysis when API fails - provide some basic concepts"""
-        print(f"Using fallback analysis for: {title}")
+        logger.debug("Using fallback analysis for: %s", title)
 
         # Generate some basic concepts based on common research paper patterns
         basic_concepts = []
-        content_lower = content.lower()
 
-        # Look for common technical terms
-        if "neural network" in content_lower or "deep learning" in content_lower:
+        # Look for common technical terms, all in one case-insensitive pass
+        # over the text (no lowered copy of the whole paper)
+        found = {term.lower() for term in _FALLBACK_KEYWORDS_RE.findall(content)}
+
+        if "neural network" in found or "deep learning" in found:
             basic_concepts.append(
                 {
                     "name": "Neural Network Architecture",
@@ -878,7 +1112,7 @@ Your task is to write a **single, concise** Python script that demonstrates the
                 }
             )
 
-        if "algorithm" in content_lower:
+        if "algorithm" in found:
             basic_concepts.append(
                 {
                     "name": "Algorithmic Approach",
@@ -887,7 +1121,7 @@ Your task is to write a **single, concise** Python script that demonstrates the
                 }
             )
 
-        if "model" in content_lower and "training" in content_lower:
+        if "model" in found and "training" in found:
             basic_concepts.append(
                 {
                     "name": "Model Training",
@@ -917,7 +1151,7 @@ Your task is to write a **single, concise** Python script that demonstrates the
 
     async def _fallback_concept_extraction(self, content: str) -> List[Dict[str, Any]]:
         """Fallback concept extraction - generate one basic concept"""
-        print("Using fallback concept extraction")
+        logger.debug("Using fallback concept extraction")
         return [
             {
                 "name": "Additional Research Concept",
@@ -928,56 +1162,14 @@ Your task is to write a **single, concise** Python script that demonstrates the
 
     async def _fallback_additional_concept(
         self, timestamp: int = None
-    ) -> Dict[str, Any]:
+    ) -> Mapping[str, Any]:
         """Fallback for when additional concept generation fails - make it unique each time"""
-        print("Using fallback additional concept")
-
-        import time
+        logger.debug("Using fallback additional concept")
 
         if timestamp is None:
             timestamp = int(time.time())
 
-        # Generate varied fallback concepts to ensure uniqueness
-        fallback_concepts = [
-            {
-                "name": "Research Implementation Details",
-                "description": "Specific implementation aspects and technical details of the research methodology",
-                "importance_score": 0.6,
-                "concept_type": "technical",
-            },
-            {
-                "name": "Experimental Design Framework",
-                "description": "The underlying framework and design principles used in the experimental approach",
-                "importance_score": 0.7,
-                "concept_type": "methodological",
-            },
-            {
-                "name": "Technical Analysis Method",
-                "description": "The analytical methodology and technical approach employed in this research",
-                "importance_score": 0.6,
-                "concept_type": "technical",
-            },
-            {
-                "name": "Data Processing Technique",
-                "description": "The specific data processing and analysis techniques utilized in the study",
-                "importance_score": 0.6,
-                "concept_type": "methodological",
-            },
-            {
-                "name": "Statistical Evaluation Approach",
-                "description": "The statistical methods and evaluation criteria used to assess the research results",
-                "importance_score": 0.6,
-                "concept_type": "mathematical",
-            },
-            {
-                "name": "Performance Optimization Strategy",
-                "description": "Techniques and strategies employed to optimize system or model performance",
-                "importance_score": 0.7,
-                "concept_type": "technical",
-            },
-        ]
-
         # Use timestamp to select different fallback each time
-        selected = fallback_concepts[timestamp % len(fallback_concepts)]
-        print(f"Selected fallback concept: {selected['name']}")
+        selected = _FALLBACK_CONCEPTS[timestamp % len(_FALLBACK_CONCEPTS)]
+        logger.debug("Selected fallback concept: %s", selected["name"])
         return selected
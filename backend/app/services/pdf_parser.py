@@ -1,5 +1,5 @@
 """
-PDF parsing service using pdfplumber
+PDF parsing service using PDFium (pypdfium2), falling back to pdfplumber
 Extracts text, metadata, and structure from research papers
 """
 
@@ -7,19 +7,95 @@ import pdfplumber
 import re
 import os
 import asyncio
+import functools
+import threading
 from typing import Dict, List, Tuple
 from pathlib import Path
 from ..services.blob_storage import download_from_blob, is_blob_url
 
+# PDFium text extraction (optional, falls back to pdfplumber). It skips the
+# per-character layout objects pdfplumber builds, which parse_pdf discards.
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+# PDFium is not thread-safe, and parsing runs in worker threads
+_pdfium_lock = threading.Lock()
+
+# Patterns are compiled once at import instead of being looked up in the re
+# cache on every call
+_AUTHOR_RE = re.compile(
+    r"\b[A-Z][a-z]+ [A-Z][a-z]+\b"  # First Last
+    r"|\b[A-Z]\. [A-Z][a-z]+\b"  # F. Last
+    r"|\b[A-Z][a-z]+, [A-Z][a-z]+\b"  # Last, First
+)
+_WS_RE = re.compile(r"\s+")
+
+# Case-insensitive junk-term filters: one scan per line instead of lowering
+# the line and testing each term separately
+_TITLE_SKIP_RE = re.compile(r"page|doi:|arxiv:|abstract|introduction", re.IGNORECASE)
+_SECTION_END_RE = re.compile(r"introduction|1\.|keywords|index terms", re.IGNORECASE)
+_AUTHOR_SKIP_RE = re.compile(r"university|department|email|@", re.IGNORECASE)
+_ABSTRACT_RE = re.compile(r"abstract", re.IGNORECASE)
+_AUTHOR_SPLIT_RE = re.compile(r",|\s+and\s+|&|;")
+
+# How much of the document metadata extraction looks at
+METADATA_HEAD_CHARS = 3000
+ABSTRACT_SCAN_CHARS = 15000
+ABSTRACT_SCAN_LINES = 80
+
+# _clean_text keeps 10k characters, so stop extracting pages once this much
+# raw text is in hand (slack for the whitespace and junk lines it removes)
+EXTRACT_TEXT_CAP_CHARS = 30000
+
+# Whole lines that are page artifacts: under 3 characters once stripped, a
+# bare page number, or a "Page N" header/footer
+_JUNK_LINE_RE = re.compile(
+    r"^[^\S\n]*(?:\S{0,2}|\d+|Page \d+[^\n]*?)[^\S\n]*$\n?", re.MULTILINE
+)
+
+
+_LINE_RE = re.compile(r"[^\n]+")
+
+
+def _stripped_lines(text: str) -> List[str]:
+    """Non-blank lines of text, stripped (each line is stripped only once)"""
+    lines = []
+    for match in _LINE_RE.finditer(text):
+        line = match.group().strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_page_count(real_path: str, mtime: float) -> int:
+    """Page count of a local PDF; mtime in the key invalidates rewritten files"""
+    with pdfplumber.open(real_path) as pdf:
+        return len(pdf.pages)
+
+
+def _page_count(file_path: str, cacheable: bool) -> int:
+    if not cacheable:
+        with pdfplumber.open(file_path) as pdf:
+            return len(pdf.pages)
+    real_path = os.path.realpath(file_path)
+    return _cached_page_count(real_path, os.path.getmtime(real_path))
+
 
 class PDFParser:
     def __init__(self):
         pass
 
-    async def parse_pdf(self, file_path: str) -> Dict[str, any]:
+    async def parse_pdf(self, file_path: str, validate_only: bool = False) -> Dict[str, any]:
         """
         Parse PDF file and extract content, metadata, and structure
         Supports both local file paths and Vercel Blob URLs
+
+        With validate_only, only the page count is read (cached per local
+        file and mtime) and no text is extracted.
         """
         temp_file_path = None
         try:
@@ -39,56 +115,39 @@ class PDFParser:
                     }
                 actual_file_path = temp_file_path
             else:
+                if validate_only and not Path(file_path).exists():
+                    return {"page_count": 0, "success": False, "error": "File does not exist"}
                 actual_file_path = file_path
-            
-            # Open PDF document
-            with pdfplumber.open(actual_file_path) as pdf:
-                # Extract metadata
-                metadata = pdf.metadata or {}
-
-                # Extract text content
-                full_text = ""
-                page_texts = []
 
-                for page in pdf.pages:
-                    page_text = page.extract_text() or ""
-                    page_texts.append(page_text)
-                    full_text += page_text + "\n"
-
-            # Extract title, authors, and abstract
-            title, authors, abstract = self._extract_paper_metadata(full_text, metadata)
-
-            # Clean the full text
-            cleaned_text = self._clean_text(full_text)
-
-            result = {
-                "title": title,
-                "authors": authors,
-                "abstract": abstract,
-                "content": cleaned_text,
-                "page_count": len(page_texts),
-                "metadata": metadata,
-                "success": True,
-            }
+            if validate_only:
+                page_count = await asyncio.to_thread(
+                    _page_count, actual_file_path, temp_file_path is None
+                )
+                result = {"page_count": page_count, "success": page_count > 0}
+                if not page_count:
+                    result["error"] = "PDF has no pages"
+                self._remove_temp_file(temp_file_path)
+                return result
+
+            # Extraction and text processing are synchronous and CPU-bound;
+            # run all of it in one worker thread, off the event loop
+            result = await asyncio.to_thread(self._parse_sync, actual_file_path)
             
             # Clean up temporary file if we downloaded from blob
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.remove(temp_file_path)
-                    print(f"[PDF_PARSER] Cleaned up temporary file: {temp_file_path}")
-                except Exception as e:
-                    print(f"[PDF_PARSER] Warning: Failed to delete temp file: {e}")
+            self._remove_temp_file(temp_file_path)
             
             return result
 
         except Exception as e:
-            print(f"✗ Error parsing PDF: {e}")
             # Clean up temporary file on error
             if temp_file_path and os.path.exists(temp_file_path):
                 try:
                     os.remove(temp_file_path)
                 except:
                     pass
+            if validate_only:
+                return {"page_count": 0, "success": False, "error": f"Invalid PDF: {str(e)}"}
+            print(f"✗ Error parsing PDF: {e}")
             return {
                 "title": "",
                 "authors": [],
@@ -100,14 +159,89 @@ class PDFParser:
                 "error": str(e),
             }
 
+    def _parse_sync(self, file_path: str) -> Dict[str, any]:
+        metadata, page_texts, page_count = self._extract_pages(file_path)
+        full_text = "\n".join(page_texts)
+
+        # Extract title, authors, and abstract
+        title, authors, abstract = self._extract_paper_metadata(full_text, metadata)
+
+        # Clean the full text
+        cleaned_text = self._clean_text(full_text)
+
+        return {
+            "title": title,
+            "authors": authors,
+            "abstract": abstract,
+            "content": cleaned_text,
+            "page_count": page_count,
+            "metadata": metadata,
+            "success": True,
+        }
+
+    def _extract_pages(self, file_path: str) -> Tuple[dict, List[str], int]:
+        """
+        Open the PDF and return its metadata, the text of its leading pages
+        (up to EXTRACT_TEXT_CAP_CHARS) and its total page count.
+        Pages are read one after another: they share the document's file
+        handle and parser state, so they can't be extracted in parallel
+        threads.
+        """
+        if PDFIUM_AVAILABLE:
+            try:
+                return self._extract_pages_pdfium(file_path)
+            except Exception as e:
+                print(f"[PDF_PARSER] PDFium extraction failed: {e}, trying pdfplumber...")
+
+        with pdfplumber.open(file_path) as pdf:
+            # Extract metadata
+            metadata = pdf.metadata or {}
+
+            # Extract text content
+            page_texts = []
+            total = 0
+            for page in pdf.pages:
+                page_text = page.extract_text() or ""
+                page_texts.append(page_text)
+                total += len(page_text)
+                if total > EXTRACT_TEXT_CAP_CHARS:
+                    break
+            page_count = len(pdf.pages)
+
+        return metadata, page_texts, page_count
+
+    def _extract_pages_pdfium(self, file_path: str) -> Tuple[dict, List[str], int]:
+        with _pdfium_lock:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                metadata = pdf.get_metadata_dict(skip_empty=True)
+                page_count = len(pdf)
+                page_texts = []
+                total = 0
+                for index in range(page_count):
+                    page = pdf[index]
+                    textpage = page.get_textpage()
+                    page_text = textpage.get_text_range().replace("\r\n", "\n")
+                    textpage.close()
+                    page.close()
+                    page_texts.append(page_text)
+                    total += len(page_text)
+                    if total > EXTRACT_TEXT_CAP_CHARS:
+                        break
+            finally:
+                pdf.close()
+
+        return metadata, page_texts, page_count
+
     def _extract_paper_metadata(
         self, text: str, pdf_metadata: dict
     ) -> Tuple[str, List[str], str]:
         """
         Extract title, authors, and abstract from paper text
         """
-        lines = text.split("\n")
-        clean_lines = [line.strip() for line in lines if line.strip()]
+        # Title and authors only ever come from the first 20 lines, so only
+        # split the head of the document
+        head_lines = _stripped_lines(text[:METADATA_HEAD_CHARS])
 
         # Extract title - usually one of the first few substantial lines
         title = ""
@@ -117,19 +251,10 @@ class PDFParser:
             title = pdf_metadata["title"]
         else:
             # Look for title in first 10 lines
-            for line in clean_lines[:10]:
+            for line in head_lines[:10]:
                 if len(line) > 20 and len(line) < 200:
                     # Skip common headers/footers
-                    if not any(
-                        skip in line.lower()
-                        for skip in [
-                            "page",
-                            "doi:",
-                            "arxiv:",
-                            "abstract",
-                            "introduction",
-                        ]
-                    ):
+                    if _TITLE_SKIP_RE.search(line) is None:
                         title = line
                         break
 
@@ -141,7 +266,7 @@ class PDFParser:
             authors = [pdf_metadata["author"]]
         else:
             # Look for author patterns in first 20 lines
-            for i, line in enumerate(clean_lines[:20]):
+            for i, line in enumerate(head_lines[:20]):
                 if self._looks_like_authors(line):
                     authors = self._parse_authors(line)
                     break
@@ -150,9 +275,11 @@ class PDFParser:
         abstract = ""
         abstract_start = -1
 
-        # Find abstract section
-        for i, line in enumerate(clean_lines):
-            if line.lower().startswith("abstract"):
+        # Find abstract section; it can sit further down than the title block
+        # but well within the first pages
+        clean_lines = _stripped_lines(text[:ABSTRACT_SCAN_CHARS])
+        for i, line in enumerate(clean_lines[:ABSTRACT_SCAN_LINES]):
+            if _ABSTRACT_RE.match(line):
                 abstract_start = i
                 break
 
@@ -164,10 +291,7 @@ class PDFParser:
             ):
                 line = clean_lines[i]
                 # Stop at next section
-                if any(
-                    section in line.lower()
-                    for section in ["introduction", "1.", "keywords", "index terms"]
-                ):
+                if _SECTION_END_RE.search(line):
                     break
                 if len(line) > 10:
                     abstract_lines.append(line)
@@ -180,32 +304,22 @@ class PDFParser:
         """
         Check if a line looks like it contains author names
         """
-        # Common patterns for author lines
-        author_patterns = [
-            r"\b[A-Z][a-z]+ [A-Z][a-z]+\b",  # First Last
-            r"\b[A-Z]\. [A-Z][a-z]+\b",  # F. Last
-            r"\b[A-Z][a-z]+, [A-Z][a-z]+\b",  # Last, First
-        ]
-
-        for pattern in author_patterns:
-            if re.search(pattern, line):
-                return True
+        # Cheap length/case checks first so most non-author lines never
+        # reach the regex: every pattern needs an uppercase letter
+        if len(line) < 6 or len(line) > 200:
+            return False
+        if not any(c.isupper() for c in line[:40]):
+            return False
 
-        return False
+        # Common patterns for author lines
+        return _AUTHOR_RE.search(line) is not None
 
     def _parse_authors(self, author_line: str) -> List[str]:
         """
         Parse author names from a line
         """
-        # Common separators
-        separators = [",", " and ", "&", ";"]
-
-        authors = [author_line]  # Default to whole line
-
-        for sep in separators:
-            if sep in author_line:
-                authors = [author.strip() for author in author_line.split(sep)]
-                break
+        # Split on every common separator in one pass (the whole line if none)
+        authors = _AUTHOR_SPLIT_RE.split(author_line)
 
         # Clean and filter authors
         cleaned_authors = []
@@ -215,10 +329,7 @@ class PDFParser:
             if (
                 author
                 and len(author) > 2
-                and not any(
-                    skip in author.lower()
-                    for skip in ["university", "department", "email", "@"]
-                )
+                and _AUTHOR_SKIP_RE.search(author) is None
             ):
                 cleaned_authors.append(author)
 
@@ -228,24 +339,9 @@ class PDFParser:
         """
         Clean extracted text for better processing
         """
-        # Remove extra whitespace
-        text = re.sub(r"\s+", " ", text)
-
-        # Remove page headers/footers (simple heuristic)
-        lines = text.split("\n")
-        cleaned_lines = []
-
-        for line in lines:
-            line = line.strip()
-            # Skip very short lines that are likely artifacts
-            if len(line) < 3:
-                continue
-            # Skip lines that look like page numbers or headers
-            if re.match(r"^\d+$", line) or re.match(r"^Page \d+", line):
-                continue
-            cleaned_lines.append(line)
-
-        cleaned_text = "\n".join(cleaned_lines)
+        # Remove page headers/footers (simple heuristic) in one pass, before
+        # newlines are collapsed away with the rest of the extra whitespace
+        cleaned_text = _WS_RE.sub(" ", _JUNK_LINE_RE.sub("", text)).strip()
 
         # Limit text length for API efficiency
         if len(cleaned_text) > 10000:
@@ -258,47 +354,16 @@ class PDFParser:
         Validate that the file is a readable PDF
         Supports both local file paths and Vercel Blob URLs
         """
-        temp_file_path = None
-        try:
-            # If it's a blob URL, download it first
-            if is_blob_url(file_path):
-                temp_file_path = await download_from_blob(file_path)
-                if not temp_file_path:
-                    return False, "Failed to download PDF from blob storage"
-                actual_file_path = temp_file_path
-            else:
-                if not Path(file_path).exists():
-                    return False, "File does not exist"
-                actual_file_path = file_path
-
-            with pdfplumber.open(actual_file_path) as pdf:
-                page_count = len(pdf.pages)
-
-            if page_count == 0:
-                # Clean up temp file
-                if temp_file_path and os.path.exists(temp_file_path):
-                    try:
-                        os.remove(temp_file_path)
-                    except:
-                        pass
-                return False, "PDF has no pages"
-
-            result = True, f"Valid PDF with {page_count} pages"
-            
-            # Clean up temporary file if we downloaded from blob
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.remove(temp_file_path)
-                except:
-                    pass
-            
-            return result
-
-        except Exception as e:
-            # Clean up temp file on error
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.remove(temp_file_path)
-                except:
-                    pass
-            return False, f"Invalid PDF: {str(e)}"
+        result = await self.parse_pdf(file_path, validate_only=True)
+        if result["success"]:
+            return True, f"Valid PDF with {result['page_count']} pages"
+        return False, result["error"]
+
+    def _remove_temp_file(self, temp_file_path) -> None:
+        """Clean up a temporary file downloaded from blob storage"""
+        if temp_file_path and os.path.exists(temp_file_path):
+            try:
+                os.remove(temp_file_path)
+                print(f"[PDF_PARSER] Cleaned up temporary file: {temp_file_path}")
+            except Exception as e:
+                print(f"[PDF_PARSER] Warning: Failed to delete temp file: {e}")
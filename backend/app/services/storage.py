@@ -2,13 +2,18 @@
 Storage service abstraction - supports both JSON and database storage
 """
 
-from typing import Dict, Optional, List
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, List, Set, Tuple
 from pathlib import Path
-import json
+import atexit
+import os
+import threading
+import time
 import uuid
+import orjson
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import delete, func
 from sqlalchemy.exc import OperationalError
 
 from ..core.config import settings
@@ -19,70 +24,279 @@ from ..database.models import (
 )
 from ..database import get_db
 
-PERSISTENCE_FILE = Path("storage/papers_db.json")
+# One JSON file per paper, so a save rewrites only that paper's shard
+PERSISTENCE_DIR = Path("storage/papers_db")
+# Pre-sharding single-file store; read once to seed PERSISTENCE_DIR
+LEGACY_PERSISTENCE_FILE = Path("storage/papers_db.json")
 
 # Global flag to determine storage mode
 USE_DATABASE = bool(settings.SUPABASE_DATABASE_URL)
 
-# Track if database connection has failed (to avoid repeated error logs)
-_db_connection_failed = False
+# Circuit breaker: after a connection failure, skip the database (and its
+# connect attempt) and serve from JSON until the retry window has passed
+DB_RETRY_SECONDS = 30.0
+_db_retry_after = 0.0
+
+
+def _db_available() -> bool:
+    return USE_DATABASE and time.monotonic() >= _db_retry_after
+
+
+def _db_failed(e: Exception) -> None:
+    """Open the breaker for DB_RETRY_SECONDS; the JSON branch loads its cache on demand"""
+    global _db_retry_after
+    _db_retry_after = time.monotonic() + DB_RETRY_SECONDS
+    print(f"Warning: Database connection failed, falling back to JSON storage for {DB_RETRY_SECONDS:.0f}s: {e}")
+
+
+# Eager-load children so converting N papers costs two extra SELECTs in
+# total instead of two per paper
+_PAPER_CHILDREN = (
+    selectinload(DBPaper.concepts),
+    selectinload(DBPaper.video_generations),
+)
+
+# Short-lived read cache for database mode. Status polling hits get_paper
+# repeatedly with the same id; entries are dropped on every save/delete so the
+# TTL only bounds staleness from writes made by other processes.
+PAPER_CACHE_TTL = 2.0
+_paper_cache: Dict[str, Tuple[float, PydanticPaper]] = {}
+_paper_list_cache: Dict[Optional[str], Tuple[float, List[PydanticPaper]]] = {}
+_paper_cache_lock = threading.RLock()
+
+
+def _cache_lookup(cache: dict, key):
+    with _paper_cache_lock:
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > PAPER_CACHE_TTL:
+            del cache[key]
+            return None
+        return entry[1]
+
+
+def _cache_store(cache: dict, key, value) -> None:
+    with _paper_cache_lock:
+        cache[key] = (time.monotonic(), value)
+
+
+def _invalidate(paper_id: str, user_id: Optional[str] = None) -> None:
+    """Drop a paper and any listing it may appear in"""
+    with _paper_cache_lock:
+        _paper_cache.pop(paper_id, None)
+        _paper_list_cache.pop(None, None)
+        if user_id:
+            _paper_list_cache.pop(user_id, None)
+
 
 # In-memory cache for JSON mode
 _papers_cache: Dict[str, PydanticPaper] = {}
 
+# user_id -> ids of that user's papers in _papers_cache, so per-user video
+# counts only walk the user's own papers. Paper ids (not ConceptVideo objects)
+# are indexed because callers mutate paper.concept_videos in place.
+_user_paper_index: Dict[Optional[str], Set[str]] = {}
+
+
+def _index_paper(paper: PydanticPaper, previous: Optional[PydanticPaper] = None) -> None:
+    if previous is not None and previous.user_id != paper.user_id:
+        _unindex_paper(previous)
+    _user_paper_index.setdefault(paper.user_id, set()).add(paper.id)
+
+
+def _unindex_paper(paper: PydanticPaper) -> None:
+    ids = _user_paper_index.get(paper.user_id)
+    if ids is not None:
+        ids.discard(paper.id)
+        if not ids:
+            del _user_paper_index[paper.user_id]
+
+
+def _user_papers(user_id: str):
+    for paper_id in tuple(_user_paper_index.get(user_id, ())):
+        paper = _papers_cache.get(paper_id)
+        if paper is not None:
+            yield paper
+
+
+def _paper_from_json(paper_data: dict) -> PydanticPaper:
+    """Rebuild a Paper from its stored JSON dict"""
+    # Convert datetime strings
+    if "upload_time" in paper_data and isinstance(paper_data["upload_time"], str):
+        paper_data["upload_time"] = datetime.fromisoformat(paper_data["upload_time"])
+    
+    # Handle ConceptVideo datetime fields and status enums
+    concept_videos = {}
+    for concept_id, video_data in paper_data.get("concept_videos", {}).items():
+        if "created_at" in video_data and isinstance(video_data["created_at"], str):
+            video_data["created_at"] = datetime.fromisoformat(video_data["created_at"])
+        video_data["status"] = VideoStatus(video_data["status"])
+        concept_videos[concept_id] = ConceptVideo.model_construct(**video_data)
+    paper_data["concept_videos"] = concept_videos
+    
+    paper_data["concepts"] = [
+        PydanticConcept.model_construct(**concept_data)
+        for concept_data in paper_data.get("concepts", [])
+    ]
+    if "analysis_status" in paper_data:
+        paper_data["analysis_status"] = AnalysisStatus(paper_data["analysis_status"])
+    if "video_status" in paper_data:
+        paper_data["video_status"] = VideoStatus(paper_data["video_status"])
+    
+    if "user_id" not in paper_data:
+        paper_data["user_id"] = None
+    
+    # model_construct skips validation: these files are only ever written by
+    # _write_paper_shard from already-validated models, so nested objects and
+    # enums are rebuilt by hand above
+    return PydanticPaper.model_construct(**paper_data)
+
 
 def _load_papers_from_json():
-    """Load papers from JSON file"""
+    """Load papers from the per-paper JSON files"""
     global _papers_cache
-    if PERSISTENCE_FILE.exists():
+    # Don't let a reload drop saves the background flusher hasn't written yet
+    if _dirty.is_set():
+        _flush_papers_json()
+    _papers_cache = {}
+    _papers_serialized.clear()
+    _user_paper_index.clear()
+    if PERSISTENCE_DIR.is_dir():
+        for shard in PERSISTENCE_DIR.glob("*.json"):
+            try:
+                # Hand raw bytes to orjson so the file is never decoded to str first
+                with open(shard, "rb") as f:
+                    raw = f.read()
+                _papers_cache[shard.stem] = _paper_from_json(orjson.loads(raw))
+                _papers_serialized[shard.stem] = raw
+            except Exception as e:
+                print(f"Error loading paper from {shard}: {e}")
+    elif LEGACY_PERSISTENCE_FILE.exists():
         try:
-            with open(PERSISTENCE_FILE, "r") as f:
-                data = json.load(f)
-                _papers_cache = {}
-                for paper_id, paper_data in data.items():
-                    # Convert datetime strings
-                    if "upload_time" in paper_data and isinstance(paper_data["upload_time"], str):
-                        paper_data["upload_time"] = datetime.fromisoformat(paper_data["upload_time"])
-                    
-                    # Handle ConceptVideo datetime fields
-                    if "concept_videos" in paper_data:
-                        for concept_id, video_data in paper_data["concept_videos"].items():
-                            if "created_at" in video_data and isinstance(video_data["created_at"], str):
-                                video_data["created_at"] = datetime.fromisoformat(video_data["created_at"])
-                    
-                    if "user_id" not in paper_data:
-                        paper_data["user_id"] = None
-                    
-                    _papers_cache[paper_id] = PydanticPaper(**paper_data)
+            with open(LEGACY_PERSISTENCE_FILE, "rb") as f:
+                data = orjson.loads(f.read())
+            for paper_id, paper_data in data.items():
+                _papers_cache[paper_id] = _paper_from_json(paper_data)
+            # Split into shards once; the legacy file is left in place
+            for paper_id, paper in _papers_cache.items():
+                _write_paper_shard(paper_id, paper)
         except Exception as e:
             print(f"Error loading papers from JSON: {e}")
             _papers_cache = {}
+    for paper in _papers_cache.values():
+        _index_paper(paper)
+
+
+# paper_id -> bytes last written to (or read from) that paper's file. Many
+# saves only re-store an unchanged paper (e.g. repeated status updates), so
+# those skip the temp-file write and rename entirely.
+_papers_serialized: Dict[str, bytes] = {}
 
 
-def _save_papers_to_json():
-    """Save papers to JSON file"""
+def _write_paper_shard(paper_id: str, paper: Optional[PydanticPaper]) -> bool:
+    """Atomically write one paper's file, or remove it if the paper is gone; False on failure"""
+    shard = PERSISTENCE_DIR / f"{paper_id}.json"
     try:
-        PERSISTENCE_FILE.parent.mkdir(parents=True, exist_ok=True)
-        data = {}
-        for paper_id, paper in _papers_cache.items():
-            data[paper_id] = paper.model_dump(mode='json')
-        with open(PERSISTENCE_FILE, "w") as f:
-            json.dump(data, f, indent=2, default=str)
+        if paper is None:
+            _papers_serialized.pop(paper_id, None)
+            shard.unlink(missing_ok=True)
+            return True
+        # Serialize straight to JSON in pydantic-core, skipping the
+        # intermediate dict a model_dump + orjson.dumps pass would build
+        payload = paper.model_dump_json(indent=2).encode()
+        if _papers_serialized.get(paper_id) == payload:
+            return True
+        PERSISTENCE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = shard.with_suffix(".json.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, shard)
+        _papers_serialized[paper_id] = payload
+        return True
     except Exception as e:
-        print(f"Error saving papers to JSON: {e}")
+        print(f"Error saving paper {paper_id} to JSON: {e}")
+        return False
+
+
+# Saves only record which papers changed; a background thread coalesces bursts
+# of saves into one write per touched paper per debounce window so request
+# handlers never block on disk
+FLUSH_DEBOUNCE_SECONDS = 0.25
+# Papers whose write failed stay dirty and are retried after this pause
+FLUSH_RETRY_SECONDS = 5.0
+_dirty = threading.Event()
+_dirty_ids: Set[str] = set()
+_dirty_ids_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_flush_thread: Optional[threading.Thread] = None
+
+
+def _flush_papers_json() -> bool:
+    """Write every dirty paper; returns False if some writes failed and were requeued"""
+    with _flush_lock:
+        with _dirty_ids_lock:
+            _dirty.clear()
+            paper_ids = list(_dirty_ids)
+            _dirty_ids.clear()
+        failed = [
+            paper_id for paper_id in paper_ids
+            if not _write_paper_shard(paper_id, _papers_cache.get(paper_id))
+        ]
+        if failed:
+            with _dirty_ids_lock:
+                _dirty_ids.update(failed)
+                _dirty.set()
+        return not failed
+
+
+def _flush_loop():
+    while True:
+        _dirty.wait()
+        time.sleep(FLUSH_DEBOUNCE_SECONDS)
+        if not _flush_papers_json():
+            time.sleep(FLUSH_RETRY_SECONDS)
+
+
+def _flush_pending_on_exit():
+    if _dirty.is_set():
+        _flush_papers_json()
+
 
+def _save_papers_to_json(paper_id: str):
+    """Schedule a paper's file to be rewritten (or removed) by the background flusher"""
+    global _flush_thread
+    if _flush_thread is None:
+        with _flush_lock:
+            if _flush_thread is None:
+                _flush_thread = threading.Thread(target=_flush_loop, name="papers-json-flush", daemon=True)
+                _flush_thread.start()
+                atexit.register(_flush_pending_on_exit)
+    with _dirty_ids_lock:
+        _dirty_ids.add(paper_id)
+        _dirty.set()
 
-# Load on module import (JSON mode only)
-if not USE_DATABASE:
-    _load_papers_from_json()
 
+# The JSON store is read on first use rather than at import, so processes
+# that never touch papers don't pay for parsing it
+_papers_loaded = False
+_papers_load_lock = threading.Lock()
 
-def _pydantic_to_db_paper(pydantic: PydanticPaper, db: Session, user_id: uuid.UUID) -> DBPaper:
+
+def _ensure_loaded():
+    global _papers_loaded
+    if _papers_loaded:
+        return
+    with _papers_load_lock:
+        if not _papers_loaded:
+            _load_papers_from_json()
+            _papers_loaded = True
+
+
+def _pydantic_to_db_paper(pydantic: PydanticPaper, db: Session, user_id: str) -> DBPaper:
     """Convert Pydantic Paper to database Paper"""
-    paper_uuid = uuid.UUID(pydantic.id)
-    
     db_paper = DBPaper(
-        id=paper_uuid,
+        id=pydantic.id,
         user_id=user_id,
         title=pydantic.title or "",
         authors=pydantic.authors or [],
@@ -103,16 +317,21 @@ def _pydantic_to_db_paper(pydantic: PydanticPaper, db: Session, user_id: uuid.UU
 
 
 def _db_to_pydantic_paper(db_paper: DBPaper) -> PydanticPaper:
-    """Convert database Paper to Pydantic Paper"""
+    """Convert database Paper to Pydantic Paper
+
+    Rows were written by save_paper from validated models, so the models are
+    built with model_construct (no validation); enum and None-to-default
+    coercions that validation would otherwise cover are done explicitly here.
+    """
     # Load concepts
     concepts = []
     for db_concept in db_paper.concepts:
-        concepts.append(PydanticConcept(
-            id=str(db_concept.id),
+        concepts.append(PydanticConcept.model_construct(
+            id=db_concept.id,
             name=db_concept.name,
             description=db_concept.description,
-            importance_score=db_concept.importance_score,
-            concept_type=db_concept.concept_type,
+            importance_score=db_concept.importance_score or 0.0,
+            concept_type=db_concept.concept_type or "conceptual",
             page_numbers=db_concept.page_numbers or [],
             text_snippets=db_concept.text_snippets or [],
             related_concepts=db_concept.related_concepts or [],
@@ -122,8 +341,8 @@ def _db_to_pydantic_paper(db_paper: DBPaper) -> PydanticPaper:
     # Load concept videos
     concept_videos = {}
     for video_gen in db_paper.video_generations:
-        concept_id = str(video_gen.concept_id)
-        concept_videos[concept_id] = ConceptVideo(
+        concept_id = video_gen.concept_id
+        concept_videos[concept_id] = ConceptVideo.model_construct(
             concept_id=concept_id,
             concept_name=video_gen.concept_name,
             status=VideoStatus(video_gen.status.value),
@@ -134,9 +353,9 @@ def _db_to_pydantic_paper(db_paper: DBPaper) -> PydanticPaper:
             captions=video_gen.captions or []
         )
     
-    return PydanticPaper(
-        id=str(db_paper.id),
-        user_id=str(db_paper.user_id),
+    return PydanticPaper.model_construct(
+        id=db_paper.id,
+        user_id=db_paper.user_id,
         title=db_paper.title,
         authors=db_paper.authors or [],
         abstract=db_paper.abstract or "",
@@ -157,38 +376,68 @@ def _db_to_pydantic_paper(db_paper: DBPaper) -> PydanticPaper:
 
 
 class PaperStorage:
-    """Storage service for papers - abstracts JSON vs database"""
+    """Storage service for papers - abstracts JSON vs database
+
+    Every method takes an optional ``db`` session. Callers making several
+    storage calls in one request can share one via ``PaperStorage.session()``;
+    methods only close sessions they opened themselves.
+    """
     
     @staticmethod
-    def get_paper(paper_id: str, user_id: Optional[str] = None, skip_ownership_check: bool = False) -> Optional[PydanticPaper]:
+    @contextmanager
+    def session() -> Iterator[Optional[Session]]:
+        """Yield one database session to reuse across calls (None in JSON mode)"""
+        if not _db_available():
+            yield None
+            return
+        db = next(get_db())
+        try:
+            yield db
+        finally:
+            db.close()
+    
+    @staticmethod
+    def get_paper(
+        paper_id: str,
+        user_id: Optional[str] = None,
+        skip_ownership_check: bool = False,
+        db: Optional[Session] = None,
+    ) -> Optional[PydanticPaper]:
         """Get a paper by ID"""
-        if USE_DATABASE:
+        if _db_available():
+            paper = _cache_lookup(_paper_cache, paper_id)
+            if paper is not None:
+                if not skip_ownership_check and user_id and paper.user_id != user_id:
+                    return None
+                return paper
             try:
-                db = next(get_db())
+                owns_session = db is None
+                if owns_session:
+                    db = next(get_db())
                 try:
-                    paper_uuid = uuid.UUID(paper_id)
-                    db_paper = db.query(DBPaper).filter(DBPaper.id == paper_uuid).first()
+                    # Session.get answers from the identity map when a shared
+                    # session already holds this paper, skipping the SELECT
+                    db_paper = db.get(DBPaper, paper_id, options=_PAPER_CHILDREN)
                     if not db_paper:
                         return None
                     
+                    paper = _db_to_pydantic_paper(db_paper)
+                    _cache_store(_paper_cache, paper_id, paper)
+                    
                     # Check ownership (unless skipped for background tasks)
-                    if not skip_ownership_check and user_id and str(db_paper.user_id) != user_id:
+                    if not skip_ownership_check and user_id and paper.user_id != user_id:
                         return None
                     
-                    return _db_to_pydantic_paper(db_paper)
+                    return paper
                 finally:
-                    db.close()
+                    if owns_session:
+                        db.close()
             except OperationalError as e:
-                global _db_connection_failed
-                if not _db_connection_failed:
-                    print(f"Warning: Database connection failed, falling back to JSON storage: {e}")
-                    _db_connection_failed = True
                 # Fall through to JSON mode
-                _load_papers_from_json()  # Ensure JSON cache is loaded
+                _db_failed(e)
         
         # JSON mode (or fallback from database error)
-        if not _papers_cache:
-            _load_papers_from_json()
+        _ensure_loaded()
         if paper_id not in _papers_cache:
             return None
         paper = _papers_cache[paper_id]
@@ -197,52 +446,53 @@ class PaperStorage:
         return paper
     
     @staticmethod
-    def list_papers(user_id: Optional[str] = None) -> List[PydanticPaper]:
+    def list_papers(user_id: Optional[str] = None, db: Optional[Session] = None) -> List[PydanticPaper]:
         """List all papers, optionally filtered by user_id"""
-        if USE_DATABASE:
+        if _db_available():
+            papers = _cache_lookup(_paper_list_cache, user_id)
+            if papers is not None:
+                return list(papers)
             try:
-                db = next(get_db())
+                owns_session = db is None
+                if owns_session:
+                    db = next(get_db())
                 try:
-                    query = db.query(DBPaper)
+                    query = db.query(DBPaper).options(*_PAPER_CHILDREN)
                     if user_id:
-                        user_uuid = uuid.UUID(user_id)
-                        query = query.filter(DBPaper.user_id == user_uuid)
+                        query = query.filter(DBPaper.user_id == user_id)
                     else:
                         # In dev mode, show all papers
                         pass
                     
                     db_papers = query.all()
-                    return [_db_to_pydantic_paper(p) for p in db_papers]
+                    papers = [_db_to_pydantic_paper(p) for p in db_papers]
+                    _cache_store(_paper_list_cache, user_id, papers)
+                    return list(papers)
                 finally:
-                    db.close()
+                    if owns_session:
+                        db.close()
             except OperationalError as e:
-                global _db_connection_failed
-                if not _db_connection_failed:
-                    print(f"Warning: Database connection failed, falling back to JSON storage: {e}")
-                    _db_connection_failed = True
                 # Fall through to JSON mode
-                _load_papers_from_json()  # Ensure JSON cache is loaded
+                _db_failed(e)
         
         # JSON mode (or fallback from database error)
-        if not _papers_cache:
-            _load_papers_from_json()
+        _ensure_loaded()
         papers = list(_papers_cache.values())
         if user_id:
             papers = [p for p in papers if p.user_id == user_id]
         return papers
     
     @staticmethod
-    def save_paper(paper: PydanticPaper, user_id: str):
+    def save_paper(paper: PydanticPaper, user_id: str, db: Optional[Session] = None):
         """Save or update a paper"""
-        if USE_DATABASE:
+        if _db_available():
             try:
-                db = next(get_db())
+                owns_session = db is None
+                if owns_session:
+                    db = next(get_db())
                 try:
-                    user_uuid = uuid.UUID(user_id)
-                    paper_uuid = uuid.UUID(paper.id)
-                    
-                    # Get or create paper
-                    db_paper = db.query(DBPaper).filter(DBPaper.id == paper_uuid).first()
+                    # Get or create paper (children come along for the diff below)
+                    db_paper = db.get(DBPaper, paper.id, options=_PAPER_CHILDREN)
                     if db_paper:
                         # Update existing
                         db_paper.title = paper.title or ""
@@ -258,14 +508,18 @@ class PaperStorage:
                         db_paper.clips_paths = paper.clips_paths or []
                     else:
                         # Create new
-                        db_paper = _pydantic_to_db_paper(paper, db, user_uuid)
+                        db_paper = _pydantic_to_db_paper(paper, db, user_id)
                         db.add(db_paper)
                     
-                    # Update concepts
-                    existing_concept_ids = {str(c.id) for c in db_paper.concepts}
+                    # Update concepts against the children already loaded
+                    # with the paper, so no per-concept SELECT is needed. Ids
+                    # are strings on both sides (UUID(as_uuid=False)), so they
+                    # compare directly.
+                    existing_concepts = {c.id: c for c in db_paper.concepts}
+                    stale_ids = existing_concepts.keys() - {c.id for c in paper.concepts}
+                    new_rows = []
                     for pydantic_concept in paper.concepts:
-                        concept_uuid = uuid.UUID(pydantic_concept.id)
-                        db_concept = db.query(DBConcept).filter(DBConcept.id == concept_uuid).first()
+                        db_concept = existing_concepts.get(pydantic_concept.id)
                         if db_concept:
                             # Update
                             db_concept.name = pydantic_concept.name
@@ -278,8 +532,8 @@ class PaperStorage:
                             db_concept.code = pydantic_concept.code  # Update code if it exists
                         else:
                             # Create
-                            db_concept = DBConcept(
-                                id=concept_uuid,
+                            new_rows.append(DBConcept(
+                                id=pydantic_concept.id,
                                 paper_id=db_paper.id,
                                 name=pydantic_concept.name,
                                 description=pydantic_concept.description,
@@ -289,22 +543,21 @@ class PaperStorage:
                                 text_snippets=pydantic_concept.text_snippets or [],
                                 related_concepts=pydantic_concept.related_concepts or [],
                                 code=pydantic_concept.code  # Include code if it exists
-                            )
-                            db.add(db_concept)
-                        existing_concept_ids.discard(str(pydantic_concept.id))
+                            ))
                     
-                    # Delete removed concepts
-                    for concept_id in existing_concept_ids:
-                        concept_uuid = uuid.UUID(concept_id)
-                        db.query(DBConcept).filter(DBConcept.id == concept_uuid).delete()
+                    # Delete removed concepts in one Core statement (their
+                    # video rows go with them via ON DELETE CASCADE)
+                    if stale_ids:
+                        db.execute(
+                            delete(DBConcept)
+                            .where(DBConcept.id.in_(sorted(stale_ids)))
+                            .execution_options(synchronize_session=False)
+                        )
                     
                     # Update concept videos
+                    existing_videos = {v.concept_id: v for v in db_paper.video_generations}
                     for concept_id, concept_video in paper.concept_videos.items():
-                        concept_uuid = uuid.UUID(concept_id)
-                        video_gen = db.query(VideoGeneration).filter(
-                            VideoGeneration.paper_id == db_paper.id,
-                            VideoGeneration.concept_id == concept_uuid
-                        ).first()
+                        video_gen = existing_videos.get(concept_id)
                         
                         if video_gen:
                             video_gen.status = VideoStatusEnum(concept_video.status.value)
@@ -313,11 +566,11 @@ class PaperStorage:
                             video_gen.captions = concept_video.captions or []
                             video_gen.logs = concept_video.logs or []
                         else:
-                            video_gen = VideoGeneration(
-                                id=uuid.uuid4(),
-                                user_id=user_uuid,
+                            new_rows.append(VideoGeneration(
+                                id=str(uuid.uuid4()),
+                                user_id=user_id,
                                 paper_id=db_paper.id,
-                                concept_id=concept_uuid,
+                                concept_id=concept_id,
                                 concept_name=concept_video.concept_name,
                                 status=VideoStatusEnum(concept_video.status.value),
                                 video_url=concept_video.video_path,
@@ -325,133 +578,141 @@ class PaperStorage:
                                 captions=concept_video.captions or [],
                                 logs=concept_video.logs or [],
                                 created_at=concept_video.created_at
-                            )
-                            db.add(video_gen)
+                            ))
+                    
+                    # The unit of work batches these INSERTs (and the UPDATEs
+                    # above) at flush, ordered after a newly created paper row
+                    db.add_all(new_rows)
                     
                     db.commit()
+                    _invalidate(paper.id, user_id)
                 except Exception as e:
                     db.rollback()
                     raise e
                 finally:
-                    db.close()
+                    if owns_session:
+                        db.close()
             except OperationalError as e:
-                global _db_connection_failed
-                if not _db_connection_failed:
-                    print(f"Warning: Database connection failed, falling back to JSON storage: {e}")
-                    _db_connection_failed = True
                 # Fall through to JSON mode
-                _load_papers_from_json()  # Ensure JSON cache is loaded
+                _db_failed(e)
         
         # JSON mode (or fallback from database error)
-        if not _papers_cache:
-            _load_papers_from_json()
+        _ensure_loaded()
+        _index_paper(paper, _papers_cache.get(paper.id))
         _papers_cache[paper.id] = paper
-        _save_papers_to_json()
+        _save_papers_to_json(paper.id)
+        _invalidate(paper.id, user_id)
     
     @staticmethod
-    def delete_paper(paper_id: str, user_id: Optional[str] = None) -> bool:
+    def delete_paper(paper_id: str, user_id: Optional[str] = None, db: Optional[Session] = None) -> bool:
         """Delete a paper"""
-        if USE_DATABASE:
+        if _db_available():
             try:
-                db = next(get_db())
+                owns_session = db is None
+                if owns_session:
+                    db = next(get_db())
                 try:
-                    paper_uuid = uuid.UUID(paper_id)
-                    db_paper = db.query(DBPaper).filter(DBPaper.id == paper_uuid).first()
-                    if not db_paper:
-                        return False
-                    
-                    if user_id and str(db_paper.user_id) != user_id:
+                    # Ownership check and delete in one statement; concepts and
+                    # video rows are removed by the schema's ON DELETE CASCADE
+                    # instead of being loaded into the session first
+                    stmt = delete(DBPaper).where(DBPaper.id == paper_id)
+                    if user_id:
+                        stmt = stmt.where(DBPaper.user_id == user_id)
+                    owner_id = db.execute(
+                        stmt.returning(DBPaper.user_id).execution_options(synchronize_session=False)
+                    ).scalar_one_or_none()
+                    if owner_id is None:
                         return False
                     
-                    db.delete(db_paper)
                     db.commit()
+                    _invalidate(paper_id, owner_id)
                     return True
                 except Exception as e:
                     db.rollback()
                     raise e
                 finally:
-                    db.close()
+                    if owns_session:
+                        db.close()
             except OperationalError as e:
-                global _db_connection_failed
-                if not _db_connection_failed:
-                    print(f"Warning: Database connection failed, falling back to JSON storage: {e}")
-                    _db_connection_failed = True
                 # Fall through to JSON mode
-                _load_papers_from_json()  # Ensure JSON cache is loaded
+                _db_failed(e)
         
         # JSON mode (or fallback from database error)
-        if not _papers_cache:
-            _load_papers_from_json()
+        _ensure_loaded()
         if paper_id not in _papers_cache:
             return False
         paper = _papers_cache[paper_id]
         if user_id and paper.user_id != user_id:
             return False
         del _papers_cache[paper_id]
-        _save_papers_to_json()
+        _unindex_paper(paper)
+        _save_papers_to_json(paper_id)
+        _invalidate(paper_id, paper.user_id)
         return True
     
     @staticmethod
-    def count_user_videos_today(user_id: str) -> int:
+    def count_user_videos_today(user_id: str, db: Optional[Session] = None) -> int:
         """Count videos generated today by user"""
-        if USE_DATABASE:
+        if _db_available():
             try:
-                db = next(get_db())
+                owns_session = db is None
+                if owns_session:
+                    db = next(get_db())
                 try:
-                    user_uuid = uuid.UUID(user_id)
                     today = datetime.now().date()
                     today_start = datetime.combine(today, datetime.min.time())
                     
                     count = db.query(func.count(VideoGeneration.id)).filter(
-                        VideoGeneration.user_id == user_uuid,
+                        VideoGeneration.user_id == user_id,
                         VideoGeneration.created_at >= today_start,
                         VideoGeneration.status.in_([VideoStatusEnum.COMPLETED, VideoStatusEnum.GENERATING])
                     ).scalar()
                     return count or 0
                 finally:
-                    db.close()
-            except OperationalError:
+                    if owns_session:
+                        db.close()
+            except OperationalError as e:
                 # Fall through to JSON mode
-                _load_papers_from_json()  # Ensure JSON cache is loaded
+                _db_failed(e)
         
         # JSON mode (or fallback from database error)
-        if not _papers_cache:
-            _load_papers_from_json()
+        _ensure_loaded()
         today = datetime.now().date()
         today_start = datetime.combine(today, datetime.min.time())
-        count = 0
-        for paper in _papers_cache.values():
-            if paper.user_id == user_id:
-                for cv in paper.concept_videos.values():
-                    if cv.created_at >= today_start and cv.status.value in ["completed", "generating"]:
-                        count += 1
-        return count
+        return sum(
+            1
+            for paper in _user_papers(user_id)
+            for cv in paper.concept_videos.values()
+            if cv.created_at >= today_start and cv.status.value in ("completed", "generating")
+        )
     
     @staticmethod
-    def count_user_concurrent_videos(user_id: str) -> int:
+    def count_user_concurrent_videos(user_id: str, db: Optional[Session] = None) -> int:
         """Count currently generating videos for user"""
-        if USE_DATABASE:
+        if _db_available():
             try:
-                db = next(get_db())
+                owns_session = db is None
+                if owns_session:
+                    db = next(get_db())
                 try:
-                    user_uuid = uuid.UUID(user_id)
                     count = db.query(func.count(VideoGeneration.id)).filter(
-                        VideoGeneration.user_id == user_uuid,
+                        VideoGeneration.user_id == user_id,
                         VideoGeneration.status == VideoStatusEnum.GENERATING
                     ).scalar()
                     return count or 0
                 finally:
-                    db.close()
-            except OperationalError:
+                    if owns_session:
+                        db.close()
+            except OperationalError as e:
                 # Fall through to JSON mode
-                _load_papers_from_json()  # Ensure JSON cache is loaded
+                _db_failed(e)
         
         # JSON mode (or fallback from database error)
-        if not _papers_cache:
-            _load_papers_from_json()
-        count = 0
-        for paper in _papers_cache.values():
-            if paper.user_id == user_id:
-                count += sum(1 for cv in paper.concept_videos.values() if cv.status.value == "generating")
-        return count
+        _ensure_loaded()
+        return sum(
+            1
+            for paper in _user_papers(user_id)
+            for cv in paper.concept_videos.values()
+            if cv.status.value == "generating"
+        )
 
@@ -0,0 +1,99 @@
+"""
+Redis index of locally stored videos, maintained at write time so listings
+don't have to walk the videos directory
+"""
+
+import os
+import asyncio
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+from ..core.redis_client import get_redis
+
+VIDEO_INDEX_KEY = "videos:index"
+VIDEO_META_PREFIX = "videos:meta:"
+
+
+async def record_video(name: str, path: str, size: int) -> None:
+    """Add a video file that was kept in the local videos directory"""
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.sadd(VIDEO_INDEX_KEY, name)
+            pipe.hset(VIDEO_META_PREFIX + name, mapping={"size": size, "path": path})
+            await pipe.execute()
+    except Exception as e:
+        print(f"[VIDEO_INDEX] Failed to record {name}: {e}")
+
+
+def scan_videos(videos_dir: Path) -> List[Dict[str, Any]]:
+    """Blocking scan of the videos directory as [{"name", "size", "path"}]"""
+    files = []
+    with os.scandir(videos_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                files.append({"name": entry.name, "size": entry.stat().st_size, "path": entry.path})
+    return files
+
+
+async def rebuild_index(videos_dir: Path) -> None:
+    """
+    Replace the index with what's on disk (run at startup), so files written
+    before the index existed or by other paths are listed too
+    """
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        files = await asyncio.to_thread(scan_videos, videos_dir)
+    except FileNotFoundError:
+        files = []
+    try:
+        stale = await redis.smembers(VIDEO_INDEX_KEY)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.delete(VIDEO_INDEX_KEY, *(VIDEO_META_PREFIX + name for name in stale))
+            for f in files:
+                pipe.sadd(VIDEO_INDEX_KEY, f["name"])
+                pipe.hset(VIDEO_META_PREFIX + f["name"], mapping={"size": f["size"], "path": f["path"]})
+            await pipe.execute()
+    except Exception as e:
+        print(f"[VIDEO_INDEX] Failed to rebuild index: {e}")
+
+
+async def forget_video(name: str) -> None:
+    """Drop a video whose local file was removed"""
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.srem(VIDEO_INDEX_KEY, name)
+            pipe.delete(VIDEO_META_PREFIX + name)
+            await pipe.execute()
+    except Exception as e:
+        print(f"[VIDEO_INDEX] Failed to forget {name}: {e}")
+
+
+async def list_videos() -> Optional[List[Dict[str, Any]]]:
+    """
+    Return indexed videos as [{"name", "size", "path"}], or None when Redis
+    isn't available and the caller should scan the directory instead.
+    """
+    redis = get_redis()
+    if redis is None:
+        return None
+    try:
+        names = sorted(await redis.smembers(VIDEO_INDEX_KEY))
+        async with redis.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.hgetall(VIDEO_META_PREFIX + name)
+            metas = await pipe.execute()
+    except Exception as e:
+        print(f"[VIDEO_INDEX] Failed to list videos: {e}")
+        return None
+    return [
+        {"name": name, "size": int(meta.get("size", 0)), "path": meta.get("path", "")}
+        for name, meta in zip(names, metas)
+    ]
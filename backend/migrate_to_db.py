@@ -10,14 +10,25 @@ Usage:
     venv/bin/python backend/migrate_to_db.py [--dry-run] [--backup]
 """
 
+import io
 import json
 import sys
 import argparse
+import functools
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 import uuid
 
+from sqlalchemy.dialects.postgresql import ARRAY
+
+# Streaming JSON parser for large legacy papers_db.json files (optional)
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
 # Add backend to path
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
@@ -34,153 +45,291 @@ from app.database.models import (
 from app.models.paper import Paper as PydanticPaper
 from app.core.config import settings
 
-# PERSISTENCE_FILE is relative to backend directory
+# Paths are relative to backend directory. The app stores one file per paper
+# in PERSISTENCE_DIR; PERSISTENCE_FILE is the older single-file format.
+PERSISTENCE_DIR = backend_dir / "storage" / "papers_db"
 PERSISTENCE_FILE = backend_dir / "storage" / "papers_db.json"
 
 
-def load_papers_from_json() -> Dict[str, PydanticPaper]:
-    """Load papers from JSON file"""
-    if not PERSISTENCE_FILE.exists():
-        print(f"JSON file not found: {PERSISTENCE_FILE}")
-        return {}
+# Papers are migrated in batches so the legacy single-file store can be
+# streamed instead of parsed into memory all at once
+MIGRATION_BATCH_SIZE = 1000
+
+
+def _iter_json_store() -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (paper_id, paper_data) from the sharded store or the legacy file"""
+    if PERSISTENCE_DIR.is_dir():
+        for shard in PERSISTENCE_DIR.glob("*.json"):
+            with open(shard, "r") as f:
+                yield shard.stem, json.load(f)
+        return
+    with open(PERSISTENCE_FILE, "rb") as f:
+        if IJSON_AVAILABLE:
+            yield from ijson.kvitems(f, "", use_float=True)
+        else:
+            yield from json.load(f).items()
+
+
+def _paper_from_data(paper_data: Dict[str, Any]) -> PydanticPaper:
+    # Convert datetime strings back to datetime objects
+    if "upload_time" in paper_data and isinstance(paper_data["upload_time"], str):
+        paper_data["upload_time"] = datetime.fromisoformat(paper_data["upload_time"])
     
-    papers = {}
-    try:
-        with open(PERSISTENCE_FILE, "r") as f:
-            data = json.load(f)
-        
-        for paper_id, paper_data in data.items():
-            # Convert datetime strings back to datetime objects
-            if "upload_time" in paper_data and isinstance(paper_data["upload_time"], str):
-                paper_data["upload_time"] = datetime.fromisoformat(paper_data["upload_time"])
-            
-            # Handle ConceptVideo datetime fields
-            if "concept_videos" in paper_data:
-                for concept_id, video_data in paper_data["concept_videos"].items():
-                    if "created_at" in video_data and isinstance(video_data["created_at"], str):
-                        video_data["created_at"] = datetime.fromisoformat(video_data["created_at"])
-            
-            # Handle backward compatibility
-            if "user_id" not in paper_data:
-                paper_data["user_id"] = None
-            
-            paper = PydanticPaper(**paper_data)
-            papers[paper_id] = paper
-        
-        print(f"Loaded {len(papers)} papers from JSON")
-        return papers
-    except Exception as e:
-        print(f"Error loading papers from JSON: {e}")
-        import traceback
-        traceback.print_exc()
-        return {}
+    # Handle ConceptVideo datetime fields
+    if "concept_videos" in paper_data:
+        for concept_id, video_data in paper_data["concept_videos"].items():
+            if "created_at" in video_data and isinstance(video_data["created_at"], str):
+                video_data["created_at"] = datetime.fromisoformat(video_data["created_at"])
+    
+    # Handle backward compatibility
+    if "user_id" not in paper_data:
+        paper_data["user_id"] = None
+    
+    return PydanticPaper(**paper_data)
+
+
+def iter_papers_from_json() -> Iterator[Tuple[str, PydanticPaper]]:
+    """Yield papers from JSON storage one at a time"""
+    for paper_id, paper_data in _iter_json_store():
+        yield paper_id, _paper_from_data(paper_data)
+
+
+def _batched(items: Iterator, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalize_uuid(value: str) -> str:
+    """Canonical string form of a UUID; papers share owners, so parse each id once"""
+    return str(uuid.UUID(value))
+
+
+DEV_USER_ID = "00000000-0000-0000-0000-000000000000"
+
+
+def prefetch_users(db, users: Dict[str, Optional[User]], user_ids: Iterable[Optional[str]]) -> None:
+    """Load every not-yet-seen user id in one IN query; ids with no row map to None"""
+    wanted = {DEV_USER_ID}
+    for user_id in user_ids:
+        if not user_id:
+            continue
+        try:
+            wanted.add(_normalize_uuid(user_id))
+        except ValueError:
+            pass
+    missing = wanted - users.keys()
+    if not missing:
+        return
+    for user_id in missing:
+        users[user_id] = None
+    for user in db.query(User).filter(User.id.in_(missing)):
+        users[user.id] = user
 
 
-def get_or_create_user(db, user_id: str = None, email: str = None):
-    """Get existing user or create a dev user for papers without user_id"""
+def get_or_create_user(db, users: Dict[str, Optional[User]], user_id: str = None, email: str = None):
+    """Get existing user from the prefetched map or create a dev user for papers without user_id"""
     if user_id:
         try:
-            user_uuid = uuid.UUID(user_id)
-            user = db.query(User).filter(User.id == user_uuid).first()
+            # Validate/normalize; ids are stored as strings (UUID(as_uuid=False))
+            user = users.get(_normalize_uuid(user_id))
             if user:
                 return user
         except ValueError:
             pass
     
-    # Create a dev user for papers without user_id
-    dev_user_id = uuid.UUID("00000000-0000-0000-0000-000000000000")
-    user = db.query(User).filter(User.id == dev_user_id).first()
+    # Create a dev user for papers without user_id (only the first time)
+    user = users.get(DEV_USER_ID)
     if not user:
         user = User(
-            id=dev_user_id,
+            id=DEV_USER_ID,
             email=email or "dev@localhost",
             google_id=None
         )
         db.add(user)
         db.flush()
+        users[DEV_USER_ID] = user
         print(f"Created dev user: {user.id}")
     
     return user
 
 
-def migrate_paper(db, pydantic_paper: PydanticPaper, user: User):
-    """Migrate a single paper from Pydantic model to database"""
-    try:
-        paper_uuid = uuid.UUID(pydantic_paper.id)
+def paper_to_rows(pydantic_paper: PydanticPaper, user_id: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Build the papers / concepts / video_generations rows for one paper"""
+    paper_row = {
+        "id": pydantic_paper.id,
+        "user_id": user_id,
+        "title": pydantic_paper.title or "",
+        "authors": pydantic_paper.authors or [],
+        "abstract": pydantic_paper.abstract or "",
+        "filename": pydantic_paper.filename,
+        "file_path": pydantic_paper.file_path,
+        "upload_time": pydantic_paper.upload_time,
+        "analysis_status": AnalysisStatusEnum(pydantic_paper.analysis_status.value),
+        "video_status": VideoStatusEnum(pydantic_paper.video_status.value),
+        "content": pydantic_paper.content or "",
+        "full_analysis": pydantic_paper.full_analysis or "",
+        "methodology": pydantic_paper.methodology or "",
+        "insights": pydantic_paper.insights or [],
+        "video_path": pydantic_paper.video_path,
+        "clips_paths": pydantic_paper.clips_paths or [],
+    }
+    
+    concept_rows = []
+    video_rows = []
+    for pydantic_concept in pydantic_paper.concepts:
+        concept_rows.append({
+            "id": pydantic_concept.id,
+            "paper_id": pydantic_paper.id,
+            "name": pydantic_concept.name,
+            "description": pydantic_concept.description,
+            "importance_score": pydantic_concept.importance_score,
+            "concept_type": pydantic_concept.concept_type,
+            "page_numbers": pydantic_concept.page_numbers or [],
+            "text_snippets": pydantic_concept.text_snippets or [],
+            "related_concepts": pydantic_concept.related_concepts or [],
+        })
         
-        # Check if paper already exists
-        existing = db.query(DBPaper).filter(DBPaper.id == paper_uuid).first()
-        if existing:
+        # Migrate concept videos to VideoGeneration
+        concept_video = pydantic_paper.concept_videos.get(pydantic_concept.id)
+        if concept_video:
+            video_rows.append({
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "paper_id": pydantic_paper.id,
+                "concept_id": pydantic_concept.id,
+                "concept_name": concept_video.concept_name,
+                "status": VideoStatusEnum(concept_video.status.value),
+                "video_url": concept_video.video_path,
+                "clips_paths": concept_video.clips_paths or [],
+                "captions": concept_video.captions or [],
+                "logs": concept_video.logs or [],
+                "created_at": concept_video.created_at,
+                "completed_at": datetime.now() if concept_video.status.value == "completed" else None,
+            })
+    
+    return paper_row, concept_rows, video_rows
+
+
+def _pg_array_literal(items: list) -> str:
+    """Render a Python list as a PostgreSQL array literal, e.g. {"a","b"}"""
+    parts = []
+    for item in items:
+        if item is None:
+            parts.append("NULL")
+        else:
+            parts.append('"' + str(item).replace("\\", "\\\\").replace('"', '\\"') + '"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _copy_field(value: Any, process, is_array: bool) -> str:
+    """Encode one value for COPY ... FROM STDIN text format"""
+    if value is None:
+        return "\\N"
+    if is_array:
+        text = _pg_array_literal(value)
+    else:
+        if process is not None:
+            value = process(value)  # same conversion an INSERT would apply (enum names, JSON)
+        text = str(value)
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(db, model, rows: List[Dict[str, Any]]) -> None:
+    """
+    Load rows into model's table with a single COPY FROM STDIN, falling back
+    to bulk_insert_mappings if COPY isn't available (non-psycopg2 driver) or fails
+    """
+    if not rows:
+        return
+    table = model.__table__
+    columns = list(rows[0])
+    dialect = db.get_bind().dialect
+    fields = [
+        (c, table.c[c].type.bind_processor(dialect), isinstance(table.c[c].type, ARRAY))
+        for c in columns
+    ]
+    
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_copy_field(row[c], process, is_array) for c, process, is_array in fields))
+        buf.write("\n")
+    buf.seek(0)
+    
+    savepoint = db.begin_nested()
+    try:
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN", buf)
+        finally:
+            cursor.close()
+        savepoint.commit()
+    except Exception as e:
+        savepoint.rollback()
+        print(f"   COPY into {table.name} failed ({e}), using batched INSERT instead")
+        db.bulk_insert_mappings(model, rows)
+
+
+def migrate_batch(
+    db,
+    papers: List[Tuple[str, PydanticPaper]],
+    users: Dict[str, Optional[User]],
+) -> Tuple[int, int]:
+    """Insert one batch of papers with their concepts and videos; returns (migrated, errors)"""
+    error_count = 0
+    
+    # Users this batch references, fetched in one query and reused by later batches
+    prefetch_users(db, users, (p.user_id for _, p in papers))
+    
+    # One query for every paper already in the database instead of one per paper
+    existing_ids = {
+        row[0] for row in db.query(DBPaper.id).filter(DBPaper.id.in_([p.id for _, p in papers]))
+    }
+    
+    paper_rows: List[Dict[str, Any]] = []
+    concept_rows: List[Dict[str, Any]] = []
+    video_rows: List[Dict[str, Any]] = []
+    for paper_id, pydantic_paper in papers:
+        if pydantic_paper.id in existing_ids:
             print(f"  Paper {pydantic_paper.id} already exists, skipping...")
-            return existing
+            continue
         
-        # Create database paper
-        db_paper = DBPaper(
-            id=paper_uuid,
-            user_id=user.id,
-            title=pydantic_paper.title or "",
-            authors=pydantic_paper.authors or [],
-            abstract=pydantic_paper.abstract or "",
-            filename=pydantic_paper.filename,
-            file_path=pydantic_paper.file_path,
-            upload_time=pydantic_paper.upload_time,
-            analysis_status=AnalysisStatusEnum(pydantic_paper.analysis_status.value),
-            video_status=VideoStatusEnum(pydantic_paper.video_status.value),
-            content=pydantic_paper.content or "",
-            full_analysis=pydantic_paper.full_analysis or "",
-            methodology=pydantic_paper.methodology or "",
-            insights=pydantic_paper.insights or [],
-            video_path=pydantic_paper.video_path,
-            clips_paths=pydantic_paper.clips_paths or []
+        # Get or create user
+        user = get_or_create_user(
+            db,
+            users,
+            user_id=pydantic_paper.user_id,
+            email=f"migrated-{pydantic_paper.id}@localhost"
         )
-        db.add(db_paper)
-        db.flush()
-        
-        # Migrate concepts
-        for pydantic_concept in pydantic_paper.concepts:
-            concept_uuid = uuid.UUID(pydantic_concept.id)
-            db_concept = DBConcept(
-                id=concept_uuid,
-                paper_id=db_paper.id,
-                name=pydantic_concept.name,
-                description=pydantic_concept.description,
-                importance_score=pydantic_concept.importance_score,
-                concept_type=pydantic_concept.concept_type,
-                page_numbers=pydantic_concept.page_numbers or [],
-                text_snippets=pydantic_concept.text_snippets or [],
-                related_concepts=pydantic_concept.related_concepts or []
-            )
-            db.add(db_concept)
-            db.flush()
-            
-            # Migrate concept videos to VideoGeneration
-            if pydantic_concept.id in pydantic_paper.concept_videos:
-                concept_video = pydantic_paper.concept_videos[pydantic_concept.id]
-                video_gen = VideoGeneration(
-                    id=uuid.uuid4(),
-                    user_id=user.id,
-                    paper_id=db_paper.id,
-                    concept_id=concept_uuid,
-                    concept_name=concept_video.concept_name,
-                    status=VideoStatusEnum(concept_video.status.value),
-                    video_url=concept_video.video_path,
-                    clips_paths=concept_video.clips_paths or [],
-                    captions=concept_video.captions or [],
-                    logs=concept_video.logs or [],
-                    created_at=concept_video.created_at,
-                    completed_at=datetime.now() if concept_video.status.value == "completed" else None
-                )
-                db.add(video_gen)
         
-        print(f"  ✓ Migrated paper: {pydantic_paper.title or pydantic_paper.filename}")
-        return db_paper
+        try:
+            paper_row, paper_concepts, paper_videos = paper_to_rows(pydantic_paper, user.id)
+        except Exception as e:
+            print(f"  ✗ Error preparing paper {pydantic_paper.id}: {e}")
+            error_count += 1
+            continue
+        paper_rows.append(paper_row)
+        concept_rows.extend(paper_concepts)
+        video_rows.extend(paper_videos)
+        print(f"  ✓ Prepared paper: {pydantic_paper.title or pydantic_paper.filename}")
     
-    except Exception as e:
-        print(f"  ✗ Error migrating paper {pydantic_paper.id}: {e}")
-        import traceback
-        traceback.print_exc()
-        db.rollback()
-        return None
+    # One COPY per table (parents first for the foreign keys) instead of
+    # an add + flush round trip per row
+    copy_rows(db, DBPaper, paper_rows)
+    copy_rows(db, DBConcept, concept_rows)
+    copy_rows(db, VideoGeneration, video_rows)
+    return len(paper_rows), error_count
 
 
 def migrate_all(dry_run: bool = False, backup: bool = True):
@@ -233,24 +382,29 @@ def migrate_all(dry_run: bool = False, backup: bool = True):
         return False
     
     # Load papers from JSON
-    print("\n2. Loading papers from JSON...")
-    papers = load_papers_from_json()
-    if not papers:
+    print("\n2. Checking JSON storage...")
+    if not PERSISTENCE_DIR.is_dir() and not PERSISTENCE_FILE.exists():
+        print(f"   JSON storage not found: {PERSISTENCE_DIR} or {PERSISTENCE_FILE}")
         print("   No papers to migrate")
         return True
     
     # Backup JSON file
     if backup and not dry_run:
-        backup_path = PERSISTENCE_FILE.with_suffix(f".json.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         import shutil
-        shutil.copy2(PERSISTENCE_FILE, backup_path)
+        if PERSISTENCE_DIR.is_dir():
+            backup_path = PERSISTENCE_DIR.with_name(f"{PERSISTENCE_DIR.name}.backup.{stamp}")
+            shutil.copytree(PERSISTENCE_DIR, backup_path)
+        else:
+            backup_path = PERSISTENCE_FILE.with_suffix(f".json.backup.{stamp}")
+            shutil.copy2(PERSISTENCE_FILE, backup_path)
         print(f"\n3. Backed up JSON file to: {backup_path}")
     
     # Migrate papers
-    print(f"\n4. Migrating {len(papers)} papers...")
+    print(f"\n4. Migrating papers in batches of {MIGRATION_BATCH_SIZE}...")
     if dry_run:
         print("   [DRY RUN] Would migrate:")
-        for paper_id, paper in papers.items():
+        for paper_id, paper in iter_papers_from_json():
             print(f"   - {paper.title or paper.filename} (user_id: {paper.user_id})")
         return True
     
@@ -258,23 +412,17 @@ def migrate_all(dry_run: bool = False, backup: bool = True):
     try:
         migrated_count = 0
         error_count = 0
+        users: Dict[str, Optional[User]] = {}
+        
+        # Everything stays in one transaction, so a failure in any batch still
+        # rolls back the whole migration
+        for batch in _batched(iter_papers_from_json(), MIGRATION_BATCH_SIZE):
+            migrated, errors = migrate_batch(db, batch, users)
+            migrated_count += migrated
+            error_count += errors
         
-        for paper_id, pydantic_paper in papers.items():
-            print(f"\n  Migrating paper: {pydantic_paper.id}")
-            
-            # Get or create user
-            user = get_or_create_user(
-                db,
-                user_id=pydantic_paper.user_id,
-                email=f"migrated-{pydantic_paper.id}@localhost"
-            )
-            
-            # Migrate paper
-            result = migrate_paper(db, pydantic_paper, user)
-            if result:
-                migrated_count += 1
-            else:
-                error_count += 1
+        if migrated_count == 0 and error_count == 0:
+            print("   No papers to migrate")
         
         # Commit all changes
         db.commit()
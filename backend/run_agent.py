@@ -6,6 +6,7 @@ import tempfile
 import re
 import shutil
 import asyncio
+from functools import lru_cache
 from pathlib import Path
 import google.genai as genai
 from google.genai import types
@@ -32,8 +33,9 @@ def send_progress(current_scene, total_scenes, stage, details=""):
 LATEX_AVAILABLE = shutil.which("latex") is not None
 
 
+@lru_cache(maxsize=16)
 def read_prompt_template(filename):
-    """Reads a prompt template from the 'prompts' directory."""
+    """Reads a prompt template from the 'prompts' directory (once per process)."""
     script_dir = Path(__file__).parent
     template_path = script_dir / "prompts" / filename
     with open(template_path, "r", encoding="utf-8") as f:
@@ -59,19 +61,28 @@ def set_gemini_model(model: str):
     global _gemini_model
     _gemini_model = model
 
-def call_gemini_with_retries(client, contents, temperature, context_label):
-    """Calls Gemini with retries for quota/rate limit errors."""
+def call_gemini_with_retries(client, contents, temperature, context_label, response_schema=None):
+    """Calls Gemini with retries for quota/rate limit errors.
+
+    With response_schema, Gemini runs in JSON mode and the reply text is a
+    JSON document matching the schema.
+    """
     global _gemini_model
     max_retries = 5
     base_delay = 2
+    config = types.GenerateContentConfig(temperature=temperature)
+    if response_schema is not None:
+        config = types.GenerateContentConfig(
+            temperature=temperature,
+            response_mime_type="application/json",
+            response_schema=response_schema,
+        )
     for attempt in range(1, max_retries + 1):
         try:
             return client.models.generate_content(
                 model=_gemini_model,
                 contents=contents,
-                config=types.GenerateContentConfig(
-                    temperature=temperature,
-                ),
+                config=config,
             )
         except Exception as e:
             error_message = str(e)
@@ -462,8 +473,24 @@ def sanitize_code(code):
     return code
 
 
+# Ask for a primary scene and a more conservative fallback in one call, so a
+# failed first render can retry without another LLM round trip
+MANIM_CODE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "code": {"type": "string"},
+        "alternate_code": {"type": "string"},
+    },
+    "required": ["code"],
+}
+
+
 def generate_manim_code(client, description):
-    """Generates the initial Manim code for a single scene."""
+    """Generates the initial Manim code for a single scene.
+
+    Returns (code, alternate_code); alternate_code is None if the model didn't
+    provide a usable one.
+    """
     template = read_prompt_template("generate_code.txt")
     cheat_sheet = read_prompt_template("manim_cheat_sheet.txt")
     prompt = template.format(description=description, cheat_sheet=cheat_sheet)
@@ -475,11 +502,19 @@ def generate_manim_code(client, description):
         prompt,
         temperature=0.3,
         context_label="Initial Manim code generation",
+        response_schema=MANIM_CODE_SCHEMA,
     )
-    code = response.text.strip()
+    raw = response.text.strip()
     log("--- AI RESPONSE (RAW CODE) ---")
-    log(code)
-    return sanitize_code(code)
+    log(raw)
+    try:
+        payload = json.loads(raw)
+        code = payload["code"]
+        alternate = (payload.get("alternate_code") or "").strip()
+    except (json.JSONDecodeError, KeyError, TypeError):
+        log("--- WARNING: Code response was not the expected JSON; treating it as raw code. ---")
+        code, alternate = raw, ""
+    return sanitize_code(code.strip()), (sanitize_code(alternate) if alternate else None)
 
 
 def correct_manim_code(client, code, error):
@@ -763,6 +798,7 @@ async def process_single_clip(i, scene_description, client, output_dir, captions
         audio_path = None
 
     code = None
+    alternate_code = None
     error = "Initial code generation failed."
 
     for attempt in range(1, 4):
@@ -773,7 +809,11 @@ async def process_single_clip(i, scene_description, client, output_dir, captions
 
         try:
             if code is None:
-                code = await asyncio.to_thread(generate_manim_code, client, scene_description)
+                code, alternate_code = await asyncio.to_thread(generate_manim_code, client, scene_description)
+            elif alternate_code is not None:
+                # Fallback version came with the first response; no LLM call needed
+                log(f"[Clip {i+1}] Trying alternate code from the initial response")
+                code, alternate_code = alternate_code, None
             else:
                 code = await asyncio.to_thread(correct_manim_code, client, code, error)
 
@@ -807,37 +847,34 @@ async def process_single_clip(i, scene_description, client, output_dir, captions
     return {"success": False, "index": i}
 
 
-async def process_clips_in_batches(scenes, client, output_dir, captions, batch_size=2):
-    """Process clips in batches to avoid overwhelming the system"""
-    all_results = []
+async def process_clips_concurrently(scenes, client, output_dir, captions, max_concurrent=3):
+    """
+    Process clips with at most max_concurrent in flight. Unlike fixed batches,
+    the next clip starts as soon as any running one finishes, so one slow
+    render doesn't hold up the clips queued behind it.
+    """
     total_scenes = len(scenes)
+    limit = max(1, min(max_concurrent, total_scenes))
+    semaphore = asyncio.Semaphore(limit)
+    log(f"=== Processing {total_scenes} clips, up to {limit} at a time ===")
 
-    for batch_start in range(0, total_scenes, batch_size):
-        batch_end = min(batch_start + batch_size, total_scenes)
-        batch = scenes[batch_start:batch_end]
-
-        batch_num = (batch_start // batch_size) + 1
-        total_batches = (total_scenes + batch_size - 1) // batch_size
-        log(f"=== Processing Batch {batch_num}/{total_batches} (Clips {batch_start+1}-{batch_end}) ===")
-
-        # Create tasks for this batch
-        batch_tasks = [
-            process_single_clip(batch_start + j, scene, client, output_dir, captions, total_scenes)
-            for j, scene in enumerate(batch)
-        ]
-
-        # Run batch in parallel
-        batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
+    async def run_clip(i, scene):
+        async with semaphore:
+            return await process_single_clip(i, scene, client, output_dir, captions, total_scenes)
 
-        # Handle any exceptions
-        for i, result in enumerate(batch_results):
-            if isinstance(result, Exception):
-                log(f"[Clip {batch_start+i+1}] Exception during processing: {result}")
-                all_results.append({"success": False, "index": batch_start + i})
-            else:
-                all_results.append(result)
+    results = await asyncio.gather(
+        *(run_clip(i, scene) for i, scene in enumerate(scenes)),
+        return_exceptions=True,
+    )
 
-        log(f"=== Batch {batch_num}/{total_batches} complete ===")
+    # Handle any exceptions
+    all_results = []
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            log(f"[Clip {i+1}] Exception during processing: {result}")
+            all_results.append({"success": False, "index": i})
+        else:
+            all_results.append(result)
 
     return all_results
 
@@ -887,7 +924,7 @@ async def async_main():
         ]
 
         log("=== Step 3: Generating clips in parallel ===")
-        results = await process_clips_in_batches(scenes, client, output_dir, captions, batch_size=3)
+        results = await process_clips_concurrently(scenes, client, output_dir, captions, max_concurrent=3)
 
         # Final progress update
         send_progress(len(scenes), len(scenes), "stitching", "Finalizing video")
@@ -213,9 +213,11 @@ export async function getConcepts(paperId: string): Promise<Concept[]> {
   return data.concepts || [];
 }
 
-export async function generateAdditionalConcept(paperId: string): Promise<Concept> {
+// count > 1 asks for a batch from a single Gemini call; the response's
+// new_concepts holds all of them, new_concept the first.
+export async function generateAdditionalConcept(paperId: string, count = 1): Promise<Concept> {
   const headers = await getHeaders();
-  const response = await fetch(`${API_URL}/api/papers/${paperId}/generate-additional-concept`, {
+  const response = await fetch(`${API_URL}/api/papers/${paperId}/generate-additional-concept?count=${count}`, {
     method: 'POST',
     headers,
   });
@@ -318,6 +320,51 @@ export async function askQuestion(
   return response.json();
 }
 
+// Streams the answer as it is generated; onChunk receives each piece of text.
+// Resolves with the full answer once the stream ends.
+export async function askQuestionStream(
+  paperId: string,
+  question: string,
+  conversationHistory: ChatMessage[] = [],
+  onChunk: (chunk: string) => void
+): Promise<string> {
+  const response = await fetch(`${API_URL}/api/papers/${paperId}/clarify/stream`, {
+    method: 'POST',
+    headers: await getHeaders(),
+    body: JSON.stringify({ 
+      question,
+      conversation_history: conversationHistory.map(msg => ({
+        role: msg.role,
+        content: msg.content
+      }))
+    }),
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error('Failed to get answer');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let answer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    const chunk = decoder.decode(value, { stream: true });
+    if (chunk) {
+      answer += chunk;
+      onChunk(chunk);
+    }
+  }
+  const rest = decoder.decode();
+  if (rest) {
+    answer += rest;
+    onChunk(rest);
+  }
+
+  return answer;
+}
+
 // Usage stats API
 export async function getUsageStats(): Promise<UsageStats> {
   const headers = await getHeaders();
@@ -14,7 +14,7 @@ import {
   getConcepts,
   generateAdditionalConcept,
   generateVideo,
-  askQuestion,
+  askQuestionStream,
   connectToLogs,
   type Paper,
   type Concept,
@@ -493,19 +493,36 @@ export default function PaperDetailPage() {
       console.log('WebSocket connected for video logs');
     };
     
+    type WsMessage = { type: string; message?: string; data?: any; messages?: WsMessage[] };
+
+    const handleMessage = (data: WsMessage) => {
+      if (data.type === 'batch' && Array.isArray(data.messages)) {
+        // Server coalesces bursts of messages into one frame
+        const lines = data.messages
+          .filter((m) => m.type === 'log' && m.message)
+          .map((m) => m.message as string);
+        if (lines.length) {
+          setVideoLogs((prev) => [...prev, ...lines]);
+        }
+        data.messages
+          .filter((m) => m.type !== 'log')
+          .forEach(handleMessage);
+      } else if (data.type === 'log' && data.message) {
+        const message = data.message;
+        setVideoLogs((prev) => [...prev, message]);
+      } else if (data.type === 'progress' && data.data) {
+        console.log('Progress update:', data.data);
+        setVideoProgress(data.data);
+      } else if (data.type === 'connected') {
+        console.log('WebSocket connection confirmed:', data.message);
+      } else if (data.type === 'keepalive' || data.type === 'pong') {
+        // Ignore keepalive messages
+      }
+    };
+
     ws.onmessage = (event) => {
       try {
-        const data = JSON.parse(event.data);
-        if (data.type === 'log' && data.message) {
-          setVideoLogs((prev) => [...prev, data.message]);
-        } else if (data.type === 'progress' && data.data) {
-          console.log('Progress update:', data.data);
-          setVideoProgress(data.data);
-        } else if (data.type === 'connected') {
-          console.log('WebSocket connection confirmed:', data.message);
-        } else if (data.type === 'keepalive' || data.type === 'pong') {
-          // Ignore keepalive messages
-        }
+        handleMessage(JSON.parse(event.data));
       } catch (err) {
         // If not JSON, treat as plain text
         setVideoLogs((prev) => [...prev, event.data]);
@@ -593,19 +610,29 @@ export default function PaperDetailPage() {
     setQuestion('');
     setIsAsking(true);
 
+    // Show the answer as it streams in: the first chunk adds the assistant
+    // message, later chunks replace it with the longer text
+    let answer = '';
+    let assistantAdded = false;
     try {
-      const response = await askQuestion(paperId, currentQuestion, messages);
-      
-      // Add assistant response to chat
-      const assistantMessage: ChatMessage = {
-        role: 'assistant',
-        content: response.answer,
-      };
-      setMessages((prev) => [...prev, assistantMessage]);
+      await askQuestionStream(paperId, currentQuestion, messages, (chunk) => {
+        answer += chunk;
+        const assistantMessage: ChatMessage = {
+          role: 'assistant',
+          content: answer,
+        };
+        if (assistantAdded) {
+          setMessages((prev) => [...prev.slice(0, -1), assistantMessage]);
+        } else {
+          assistantAdded = true;
+          setMessages((prev) => [...prev, assistantMessage]);
+        }
+      });
     } catch (err) {
       setError('Failed to get answer');
-      // Remove the user message if request failed
-      setMessages((prev) => prev.slice(0, -1));
+      // Remove the user message (and any partial answer) if request failed
+      const added = assistantAdded ? 2 : 1;
+      setMessages((prev) => prev.slice(0, -added));
     } finally {
       setIsAsking(false);
     }
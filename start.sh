@@ -139,7 +139,7 @@ mkdir -p backend/storage backend/clips backend/videos
 
 printf "%b\n" "${GREEN}Starting backend server...${NC}"
 cd backend
-nohup ../venv/bin/uvicorn app.main:app --reload --host 0.0.0.0 --port 8000 > ../backend.log 2>&1 &
+nohup ../venv/bin/uvicorn app.main:app --reload --host 0.0.0.0 --port 8000 --ws-ping-interval 30 --ws-ping-timeout 60 > ../backend.log 2>&1 &
 BACKEND_PID=$!
 echo $BACKEND_PID > ../backend.pid
 cd ..